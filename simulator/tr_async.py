@@ -0,0 +1,128 @@
+###############################################################################
+# File: tr_async.py
+# Author: agent
+# Date: 10/19/2026
+# Revision: 1.0
+# Description: This file contains the top level script for the asynchronous
+#              CDMA study of the UAV protocol. This script is meant to be run
+#              in the terminal using the command "python tr_async.py". A UAV
+#              sending a UAVPacket shares the channel with UAVs sending
+#              UAVPackets and longer TextPackets at random sample offsets,
+#              some of them repeated periodically. The BER of the UAV is
+#              plotted against the number of interfering UAVs and the run time
+#              of the overlap-add receive buffer is compared with adding
+#              full-length buffers of every user.
+###############################################################################
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+from prettytable import PrettyTable
+import uav_channel as uavc
+import uav_multiaccess as uavm
+import uav_packet as uavp
+import uav_signal as uavs
+
+# turn on/off plotting
+PLOT = True
+
+# Transmission Characteristics
+Fs = 900e6
+fc = 100
+pn_width = 16
+windowperiod = .01
+samples_per_chip = 10
+snr = -5
+
+# Scenario
+NUM_INTERFERERS = 12
+NUM_TRIALS = 20
+BUFFER_LENGTH = 400000      # samples in the receive buffer
+REPEAT_PROBABILITY = .5     # probability an interferer repeats its packet
+TEXT = 'position report'
+
+np.random.seed(42)
+
+
+def make_signal(packet):
+    '''Modulate a packet once with a random PN code, the waveform is reused
+        across all trials.'''
+    message = packet.get_message()
+    signal = uavs.UAVSignal(message.copy(), np.random.randint(0, 2, pn_width), Fs, fc, pn_width,
+                            windowperiod, samples_per_chip)
+    return message, signal, signal.modulate().copy()
+
+
+victim_message, victim, victim_waveform = make_signal(uavp.UAVPacket(1, 1, 0, 0, 0, 0, *np.random.randint(-128, 128, 6)))
+interferers = []
+for i in range(NUM_INTERFERERS):
+    fields = [i + 2, 1, 0, 0, 0, 0] + list(np.random.randint(-128, 128, 6))
+    # every other interferer sends a longer text packet
+    packet = uavp.TextPacket(*fields, TEXT=TEXT) if i % 2 else uavp.UAVPacket(*fields)
+    interferers.append(make_signal(packet)[2])
+
+channel = uavm.MultiAccessChannel(BUFFER_LENGTH)
+noise = uavc.AWGN(snr, reference_user=0, seed=1)
+
+
+def place_users(num_interferers):
+    '''Place the victim and num_interferers interferers at random offsets.'''
+    channel.clear()
+    channel.add(victim_waveform, np.random.randint(0, BUFFER_LENGTH - len(victim_waveform)))
+    for waveform in interferers[:num_interferers]:
+        offset = np.random.randint(-len(waveform), BUFFER_LENGTH)
+        if np.random.rand() < REPEAT_PROBABILITY:
+            period = len(waveform) + np.random.randint(0, 2 * len(waveform))
+            channel.add(waveform, offset, period, repeats=None)
+        else:
+            channel.add(waveform, offset)
+
+
+def dense_render():
+    '''The receive buffer built from a full-length buffer of every user.'''
+    buffers = np.zeros((len(channel.bursts), BUFFER_LENGTH))
+    for buffer, burst in zip(buffers, channel.bursts):
+        for s in burst.starts():
+            a, b = max(s, 0), min(s + len(burst.waveform), BUFFER_LENGTH)
+            if a < b:
+                buffer[a:b] = burst.waveform[a - s:b - s]
+    return buffers.sum(axis=0)
+
+
+BERs = []
+overlap_add_time = 0
+dense_time = 0
+occupied = 0
+for count in range(NUM_INTERFERERS + 1):
+    errors = 0
+    for trial in range(NUM_TRIALS):
+        place_users(count)
+        victim.BPSK = channel.receive(0, noise=noise)
+        errors += np.sum((victim.demodulate() > 0) != (victim_message > 0))
+
+        start = time.perf_counter()
+        received = channel.render()
+        overlap_add_time += time.perf_counter() - start
+        start = time.perf_counter()
+        dense = dense_render()
+        dense_time += time.perf_counter() - start
+        assert np.allclose(received, dense)
+        occupied += channel.occupied_samples()
+    BERs.append(errors / (len(victim_message) * NUM_TRIALS))
+
+table = PrettyTable()
+table.field_names = ["Interferers", "BER"]
+for count, ber in enumerate(BERs):
+    table.add_row([count, "%.2e" % ber])
+print(table)
+num_renders = (NUM_INTERFERERS + 1) * NUM_TRIALS
+print("Occupied samples per buffer: %.0f of %d" % (occupied / num_renders, BUFFER_LENGTH))
+print("Overlap-add receive buffer: %.3f s" % overlap_add_time)
+print("Full-length user buffers: %.3f s" % dense_time)
+
+if(PLOT):
+    plt.figure()
+    plt.plot(range(NUM_INTERFERERS + 1), BERs, 'bo-')
+    plt.xlabel("Number of asynchronous interfering UAVs")
+    plt.ylabel("BER")
+    plt.title("BER of a UAVPacket with asynchronous UAVPackets and TextPackets")
+    plt.show()
@@ -15,6 +15,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import uav_packet as uavp
 import uav_signal as uavs
+import uav_shared as uavsh
 
 
 ##############################################################################
@@ -24,6 +25,13 @@ pn_width = 4
 Fs = 900e6
 fc = 100
 windowperiod = .01
+# run the capacity sweep in parallel processes sharing the waveforms
+PARALLEL_SWEEP = True
+NUM_USERS = 64
+NUM_TRIALS = 200
+WORKERS = None  # number of processes, None uses every CPU
+# samples per chip of the simulation, lower is faster (use fc = 0 below 3)
+samples_per_chip = 10
 
 # make signal1
 frame1 = uavp.UAVPacket(1,2,3,4,5,6,7,8,9,10,11,12)
@@ -31,20 +39,20 @@ m1 = frame1.get_message()
 pn_code1 = frame1.get_pn_code(mbits=pn_width)
 pn_code1[pn_code1==0] = -1
 pn_code1 = np.random.randint(0, 2, pn_width)
-signal1 = uavs.UAVSignal(m1, pn_code1, Fs, fc, pn_width, windowperiod)
+signal1 = uavs.UAVSignal(m1, pn_code1, Fs, fc, pn_width, windowperiod, samples_per_chip)
 
 # make a foo signal to add to the modulated signal
 fooframe = uavp.UAVPacket(0, 1, 11, 2, 3, 4, 8, 7, -35, -2, 0, -1)
 foo = fooframe.get_message()
 foocode = fooframe.get_pn_code(mbits=pn_width)
-foo = uavs.UAVSignal(foo, foocode, Fs, fc, pn_width, windowperiod)
+foo = uavs.UAVSignal(foo, foocode, Fs, fc, pn_width, windowperiod, samples_per_chip)
 foosignal = foo.modulate()
 
 # make another foo signal to add to the modulated signal
 fooframe2 = uavp.UAVPacket(0, 1, 11, 2, 3, 4, 8, 7, -35, -2, 0, -1)
 foo2 = fooframe2.get_message()
 foocode2 = fooframe2.get_pn_code(mbits=pn_width)
-foo2 = uavs.UAVSignal(foo2, foocode2, Fs, fc, pn_width, windowperiod)
+foo2 = uavs.UAVSignal(foo2, foocode2, Fs, fc, pn_width, windowperiod, samples_per_chip)
 foosignal2 = foo2.modulate()
 
 # add the two foo signals together
@@ -73,7 +81,7 @@ def createInterferingSignal():
                             np.random.randint(0,128),np.random.randint(0,128),np.random.randint(0,128))
     m = frame.get_message()
     pn_code = frame.get_pn_code(mbits=pn_width)
-    signal = uavs.UAVSignal(m, pn_code, Fs, fc, pn_width, windowperiod)
+    signal = uavs.UAVSignal(m, pn_code, Fs, fc, pn_width, windowperiod, samples_per_chip)
     return frame, signal
 
 BERs = []
@@ -112,4 +120,25 @@ plt.xlabel("Number of Interfering Signals")
 plt.ylabel("BER")
 plt.title("BER vs Number of Interfering Signals")
 
+
+############################################################################
+# sweep the BER against the number of interfering signals in parallel. The
+# waveforms and PN codes of every user live in shared memory, so each
+# (interferer count, trial) work item only sends a few integers to the
+# worker processes
+############################################################################
+if PARALLEL_SWEEP and __name__ == '__main__':
+    users = []
+    for i in range(NUM_USERS):
+        frame, signal = createInterferingSignal()
+        users.append(signal)
+    counts = np.arange(0, NUM_USERS)
+    with uavsh.SharedWaveforms.from_signals(users) as shared:
+        sweep_BERs = uavsh.capacity_sweep(shared, counts, NUM_TRIALS, workers=WORKERS)
+    plt.figure()
+    plt.plot(counts, sweep_BERs)
+    plt.xlabel("Number of Interfering Signals")
+    plt.ylabel("BER")
+    plt.title("BER vs Number of Interfering Signals (%d trials)" % NUM_TRIALS)
+
 plt.show()
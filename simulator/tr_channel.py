@@ -0,0 +1,106 @@
+###############################################################################
+# File: tr_channel.py
+# Author: agent
+# Date: 10/19/2026
+# Revision: 1.0
+# Description: This file contains the top level script for the channel model
+#              study of the UAV protocol. This script is meant to be run in
+#              the terminal using the command "python tr_channel.py". A UAV at
+#              increasing distance from the ground station shares the channel
+#              with interfering UAVs. The batched channel pipeline applies
+#              path loss, Rician block fading, Doppler and AWGN to many trials
+#              at once and the BER is plotted against distance. The run time
+#              of the full channel is compared with the plain AWGN channel.
+###############################################################################
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+import uav_channel as uavc
+import uav_packet as uavp
+import uav_signal as uavs
+
+# turn on/off plotting
+PLOT = True
+
+# Transmission Characteristics
+Fs = 900e6
+fc = 100
+pn_width = 16
+windowperiod = .01
+samples_per_chip = 10
+snr = -5                # SNR at the reference distance
+
+# Scenario
+NUM_INTERFERERS = 3
+NUM_TRIALS = 200
+interferer_distance = 400
+distances = np.linspace(50, 1000, 20)
+velocities = 30 * np.random.default_rng(0).uniform(-1, 1, NUM_INTERFERERS + 1)
+k_factor = 5
+block_length = 160
+
+np.random.seed(42)
+
+# modulate every user once, the waveforms are reused across all trials
+frames = [uavp.UAVPacket(i + 1, 1, 0, 0, 0, 0, *np.random.randint(-128, 128, 6)) for i in range(NUM_INTERFERERS + 1)]
+messages = [frame.get_message() for frame in frames]
+pn_codes = [np.random.randint(0, 2, pn_width) for _ in frames]
+signals = [uavs.UAVSignal(m.copy(), c.copy(), Fs, fc, pn_width, windowperiod, samples_per_chip)
+           for m, c in zip(messages, pn_codes)]
+waveforms = np.stack([s.modulate() for s in signals])
+num_users, num_samples = waveforms.shape
+
+# despreading template of the UAV under test
+chips = np.where(pn_codes[0] == 0, -1, pn_codes[0])
+template = (chips[:, np.newaxis] * signals[0].s1[np.newaxis, :]).ravel()
+num_bits = len(messages[0])
+
+
+def bit_error_rate(received):
+    '''Despread a (trials x samples) batch and return the BER of user 0.'''
+    soft = received.reshape(len(received), num_bits, len(template)) @ template
+    return np.mean((soft > 0) != (messages[0] > 0))
+
+
+fading = uavc.BlockFading(num_users, num_samples, block_length, k_factor=k_factor, seed=1)
+doppler = uavc.Doppler(velocities, Fs, signals[0].sample_rate, num_samples)
+
+BERs = []
+awgn_BERs = []
+channel_time = 0
+awgn_time = 0
+for d in distances:
+    # the noise floor is fixed by the SNR at the reference distance, so
+    # the SNR of the UAV falls with its path loss
+    pathloss = uavc.PathLoss(np.concatenate(([d], np.full(NUM_INTERFERERS, interferer_distance))),
+                             reference_distance=50)
+    noise_snr = snr - 20 * np.log10(d / 50)
+    channel = uavc.Channel([pathloss, fading, uavc.AWGN(noise_snr, seed=2)])
+    start = time.perf_counter()
+    BERs.append(bit_error_rate(channel.apply(waveforms, NUM_TRIALS)))
+    channel_time += time.perf_counter() - start
+
+    plain = uavc.Channel([pathloss, uavc.AWGN(noise_snr, seed=2)])
+    start = time.perf_counter()
+    awgn_BERs.append(bit_error_rate(plain.apply(waveforms, NUM_TRIALS)))
+    awgn_time += time.perf_counter() - start
+
+# Doppler needs the analytic signal, time it on its own
+channel = uavc.Channel([fading, doppler, uavc.AWGN(snr, seed=2)])
+start = time.perf_counter()
+channel.apply(waveforms, NUM_TRIALS)
+doppler_time = time.perf_counter() - start
+
+print("Path loss + fading + AWGN: %.3f s" % channel_time)
+print("Path loss + AWGN: %.3f s" % awgn_time)
+print("Fading + Doppler + AWGN for one distance: %.3f s" % doppler_time)
+
+if(PLOT):
+    plt.figure()
+    plt.semilogy(distances, BERs, 'bo-', label='Rician fading, K = %d' % k_factor)
+    plt.semilogy(distances, awgn_BERs, 'ro-', label='AWGN')
+    plt.xlabel("Distance (m)")
+    plt.ylabel("BER")
+    plt.title("BER vs distance with %d interfering UAVs" % NUM_INTERFERERS)
+    plt.legend()
+    plt.show()
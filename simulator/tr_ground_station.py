@@ -0,0 +1,76 @@
+###############################################################################
+# File: tr_ground_station.py
+# Author: agent
+# Date: 10/19/2026
+# Revision: 1.0
+# Description: This file contains the top level script for the ground-station
+#              receive service of the UAV protocol. This script is meant to be
+#              run in the terminal using the command "python
+#              tr_ground_station.py". It starts a GroundStationService,
+#              registers a few UAVs, sends it sample blocks of the UAVs
+#              sharing the channel with noise over a local socket and prints
+#              the decoded packets and the service statistics.
+###############################################################################
+import asyncio
+import numpy as np
+import uav_ground_station as uavg
+import uav_packet as uavp
+import uav_signal as uavs
+
+# Transmission Characteristics
+Fs = 900e6
+fc = 100
+pn_width = 32
+windowperiod = .01
+# samples per chip of the simulation, lower is faster (use fc = 0 below 3)
+samples_per_chip = 10
+snr = 0
+
+# number of UAVs sharing the channel and sample blocks to send
+NUM_UAVS = 4
+NUM_BLOCKS = 50
+# maximum random delay of a block in samples
+MAX_DELAY = 200
+# decode worker pool: 'thread' or 'process'
+EXECUTOR = 'thread'
+WORKERS = 4
+
+np.random.seed(42)
+
+frames = [uavp.UAVPacket(i + 1, 1, 0, 0, 0, 0, *np.random.randint(-128, 128, 6)) for i in range(NUM_UAVS)]
+pn_codes = [np.random.randint(0, 2, pn_width) for _ in range(NUM_UAVS)]
+
+
+def make_block():
+    '''Create a sample block of all UAVs on the channel with noise.'''
+    waveform = 0
+    for frame, pn_code in zip(frames, pn_codes):
+        waveform = waveform + uavs.UAVSignal(frame.get_message(), pn_code.copy(), Fs, fc, pn_width, windowperiod, samples_per_chip).modulate(SNR=snr)
+    delay = np.random.randint(0, MAX_DELAY)
+    return np.concatenate((np.random.normal(0, .1, delay), waveform, np.random.normal(0, .1, MAX_DELAY - delay)))
+
+
+async def main():
+    blocks = [make_block() for _ in range(NUM_BLOCKS)]
+    service = uavg.GroundStationService(workers=WORKERS, executor=EXECUTOR)
+    for frame, pn_code in zip(frames, pn_codes):
+        service.register(frame.UAV_ID, pn_code, Fs=Fs, fc=fc, bit_t=windowperiod,
+                         samples_per_chip=samples_per_chip)
+    packets = service.subscribe()
+    await service.start()
+
+    async def consume():
+        while True:
+            uav_id, packet = await packets.get()
+            correct = frames[uav_id - 1].compare(packet.get_message())
+            print("UAV %d: packet %s" % (uav_id, "correct" if correct else "wrong"))
+
+    consumer = asyncio.create_task(consume())
+    await uavg.send_blocks(blocks, port=service.port)
+    await service.stop()
+    consumer.cancel()
+    service.print_stats()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
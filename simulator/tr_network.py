@@ -0,0 +1,89 @@
+###############################################################################
+# File: tr_network.py
+# Author: agent
+# Date: 10/19/2026
+# Revision: 1.0
+# Description: This file contains the top level script for the network
+#              simulation of the UAV protocol. This script is meant to be run
+#              in the terminal using the command "python tr_network.py". It
+#              builds a swarm of UAV nodes sending UAVFrame objects to a few
+#              ground stations and runs the discrete-event simulator with a
+#              BER lookup derived from the physical layer. Every UAV sends
+#              flight-control frames next to bulk TextPacket frames through a
+#              priority transmit queue with admission control. It reports the
+#              throughput, latency percentiles and loss of the network.
+###############################################################################
+import time
+import numpy as np
+import matplotlib.pyplot as plt
+import uav_frame as uavfr
+import uav_mac as uavm
+import uav_network as uavn
+import uav_packet as uavp
+
+# use the measured BER of UAVSignal instead of the Gaussian approximation
+# NOTE: this will take a long time to run for a large number of users
+SIMULATED_BER = False
+# turn on/off plotting
+PLOT = True
+
+# Transmission Characteristics
+pn_width = 64
+bit_rate = 1e4
+snr = -5
+
+# Network
+NUM_UAVS = 240
+NUM_STATIONS = 4
+control_interval = .5
+bulk_interval = 2
+sim_time = 60
+
+# MAC: 'fifo', 'strict', 'wfq' or 'deadline' transmit queues
+SCHEDULER = 'strict'
+# turn on/off admission control at the target BER
+ADMISSION = True
+target_ber = 1e-4
+
+np.random.seed(42)
+
+############################################################################
+# physical layer lookup
+############################################################################
+snrs = np.arange(-40, 11)
+if SIMULATED_BER:
+    ber_table = uavn.BERTable.from_simulation(pn_width, snrs, NUM_UAVS // NUM_STATIONS)
+else:
+    ber_table = uavn.BERTable.gaussian(pn_width, snrs, NUM_UAVS)
+
+############################################################################
+# build the network and run it
+############################################################################
+admission = uavm.AdmissionControl(target_ber) if ADMISSION else None
+sim = uavn.NetworkSimulator(ber_table, bit_rate=bit_rate, seed=42, admission=admission)
+for address in range(NUM_STATIONS):
+    sim.add_ground_station(address)
+for i in range(NUM_UAVS):
+    source = NUM_STATIONS + i
+    destination = i % NUM_STATIONS
+    control = uavp.UAVPacket(i % 128, destination, 0, 0, 0, 0, *np.random.randint(-128, 128, 6))
+    bulk = uavp.TextPacket(i % 128, destination, TEXT="telemetry log of UAV %d" % i)
+    queue = uavm.make_queue(SCHEDULER)
+    node = sim.add_uav(uavfr.UAVFrame(control, uavm.CONTROL_PRIORITY, source, destination),
+                       control_interval, snr, queue=queue)
+    sim.add_flow(node, uavfr.UAVFrame(bulk, 0, source, destination), bulk_interval)
+
+start = time.time()
+stats = sim.run(sim_time, warmup=1)
+elapsed = time.time() - start
+stats.print_stats()
+print("Events per minute: ", stats.num_events / elapsed * 60)
+
+# plot the latency distribution
+if(PLOT):
+    plt.figure()
+    plt.hist(stats.latencies, bins=100)
+    plt.xlabel("Latency (s)")
+    plt.ylabel("Frames")
+    plt.title("Frame latency of %d UAVs" % NUM_UAVS)
+    plt.show()
@@ -0,0 +1,78 @@
+###############################################################################
+# File: tr_sweep.py
+# Author: agent
+# Date: 10/19/2026
+# Revision: 1.0
+# Description: This file contains the top level script for a CDMA capacity
+#              sweep sharded over several machines. This script is meant to be
+#              run in the terminal using the command "python tr_sweep.py". It
+#              plans the sweep in SWEEP_DIR, runs LOCAL_WORKERS worker
+#              processes, merges the shard results and prints the BER and
+#              capacity tables. To spread the sweep over more nodes, put
+#              SWEEP_DIR on a shared filesystem and also run
+#              "python tr_sweep.py worker" on the other nodes.
+###############################################################################
+import os
+import sys
+import numpy as np
+import matplotlib.pyplot as plt
+import uav_shared as uavsh
+import uav_sweep as uavsw
+
+# turn on/off plotting
+PLOT = True
+# check the merged result against a capacity sweep on this node
+CHECK_SINGLE_NODE = True
+
+# shared directory of the sweep
+SWEEP_DIR = 'sweep'
+LOCAL_WORKERS = 4
+# seconds after which the shard of a crashed worker is taken over
+STALE_AFTER = 600
+
+# Scenario
+NUM_USERS = 64
+NUM_TRIALS = 100
+SHARD_SIZE = 200
+TARGET_BER = 1e-3
+counts = np.arange(0, 40)
+pn_width = 16
+Fs = 900e6
+fc = 100
+windowperiod = .01
+samples_per_chip = 10
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['worker']:
+        # the workers of this node share one copy of the users
+        num_shards = uavsw.run_local(SWEEP_DIR, LOCAL_WORKERS, STALE_AFTER)
+        print("Computed %d shards" % num_shards)
+        sys.exit()
+
+    # a sweep left in SWEEP_DIR is resumed, remove the directory to start again
+    if os.path.exists(os.path.join(SWEEP_DIR, uavsw.SCENARIO_FILE)):
+        print("Resuming the sweep in %s" % SWEEP_DIR)
+    else:
+        num_shards = uavsw.plan_sweep(SWEEP_DIR, counts, NUM_TRIALS, SHARD_SIZE, NUM_USERS,
+                                      pn_width=pn_width, Fs=Fs, fc=fc, bit_t=windowperiod,
+                                      samples_per_chip=samples_per_chip)
+        print("Planned %d shards in %s" % (num_shards, SWEEP_DIR))
+    uavsw.run_local(SWEEP_DIR, LOCAL_WORKERS, STALE_AFTER)
+    BERs = uavsw.merge_sweep(SWEEP_DIR)
+    uavsw.print_sweep(counts, BERs, TARGET_BER)
+
+    if CHECK_SINGLE_NODE:
+        scenario = uavsw.load_scenario(SWEEP_DIR)
+        with uavsw.make_users(scenario) as shared:
+            single_BERs = uavsh.capacity_sweep(shared, counts, NUM_TRIALS, scenario['victim'], workers=0,
+                                               seed=scenario['seed'])
+        print("Identical to a single-node sweep: %s" % np.array_equal(BERs, single_BERs))
+
+    if(PLOT):
+        plt.figure()
+        plt.semilogy(counts, BERs, 'bo-')
+        plt.axhline(TARGET_BER, color='r', linestyle='--')
+        plt.xlabel("Number of Interfering Signals")
+        plt.ylabel("BER")
+        plt.title("BER vs Number of Interfering Signals (%d trials)" % NUM_TRIALS)
+        plt.show()
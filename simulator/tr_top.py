@@ -21,8 +21,11 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
+from prettytable import PrettyTable
 import uav_packet as uavp
 import uav_signal as uavs
+import uav_fec as uavf
+import uav_frame as uavfr
 
 # enabl CDMA capacity demo NOTE: this will take a long time to run for a large number
 # of interfering values
@@ -31,6 +34,13 @@ DEMO_CAPACITY = False
 PLOT = True
 # specify number of different interfering values to calculate
 NUM_BERS = 30
+# enable the forward error correction demo
+DEMO_FEC = False
+# enable the framing demo, packets are framed, sent through a UAVSignal and deframed
+DEMO_FRAMING = True
+# enable the samples per chip demo, a quick BER sweep at 2 samples per chip is
+# checked against the full capture rate
+DEMO_SAMPLE_RATE = True
 
 
 
@@ -52,14 +62,16 @@ Fs = 900e6
 fc = 100
 pn_width = 4
 windowperiod = .01
+# samples per chip of the simulation, lower is faster (use fc = 0 below 3)
+samples_per_chip = 10
 
 # PN code gen to multiply with message
 pn_code1 = np.random.randint(0, 2, pn_width)
 pn_code2 = np.random.randint(0, 2, pn_width)
 
 # now create a UAVSignal object for each message
-signal1 = uavs.UAVSignal(m1, pn_code1, Fs, fc, pn_width, windowperiod)
-signal2 = uavs.UAVSignal(m2, pn_code2, Fs, fc, pn_width, windowperiod)
+signal1 = uavs.UAVSignal(m1, pn_code1, Fs, fc, pn_width, windowperiod, samples_per_chip)
+signal2 = uavs.UAVSignal(m2, pn_code2, Fs, fc, pn_width, windowperiod, samples_per_chip)
 
 # get the modulated signal 
 modulated_signal1 = signal1.modulate(plot=True)
@@ -86,10 +98,13 @@ BERs = np.array([])
 snr = -60
 num_wrong = 0
 
+# the signal is re-armed with every SNR and reuses its buffers
+result = np.empty(len(signal1.original_message))
 while snr < 10:
     num_wrong = 0
-    signal1.modulate(SNR=snr, plot=False)
-    signal1.demodulate()
+    signal1.rearm(SNR=snr)
+    signal1.modulate(plot=False)
+    signal1.demodulate(out=result)
     # if frame1.compare(signal1.result):
     #     signal1.modulate(SNR=snr, plot=True)
     #     signal1.modulate(plot=True)
@@ -101,12 +116,93 @@ while snr < 10:
                 if signal1.original_message[j] != signal1.result[j]:
                     num_wrong += 1
     BERs = np.append(BERs, num_wrong/len(signal1.original_message))
+signal1.SNR = None
 plt.figure()
 plt.semilogy(np.arange(-60, 10), BERs, 'bo-')
 plt.xlabel("SNR (dB)")
 plt.ylabel("BER")
 plt.title("BER vs SNR")
 
+############################################################################
+# compare the BER vs SNR of the uncoded message with the message protected
+# by the rate 1/2 convolutional code and soft decision Viterbi decoding
+############################################################################
+if DEMO_FEC:
+    code = uavf.ConvolutionalCode()
+    message = frame1.get_message()
+    coded = code.encode(message)
+    coded_signal = uavs.UAVSignal(coded, pn_code1, Fs, fc, pn_width, windowperiod, samples_per_chip)
+    # the coded signal is longer, lower its SNR so the energy per information
+    # bit is the same as for the uncoded signal
+    rate_loss = 10 * np.log10(len(coded) / len(message))
+    coded_BERs = np.array([])
+    for snr in range(-60, 10):
+        coded_signal.modulate(SNR=snr - rate_loss, plot=False)
+        decoded = code.decode(coded_signal.demodulate(soft=True), len(message))
+        coded_BERs = np.append(coded_BERs, np.mean(decoded != message))
+    plt.figure()
+    plt.semilogy(np.arange(-60, 10), BERs, 'bo-', label='Uncoded')
+    plt.semilogy(np.arange(-60, 10), coded_BERs, 'ro-', label='Rate 1/2 convolutional code')
+    plt.xlabel("SNR of the uncoded signal (dB), equal energy per information bit")
+    plt.ylabel("BER")
+    plt.title("BER vs SNR with forward error correction")
+    plt.legend()
+
+############################################################################
+# run a quick BER sweep at 2 samples per chip with a baseband carrier and
+# check its fidelity at the capture rate. A waveform simulated at 10 samples
+# per chip is also resampled to the capture rate and back before decoding
+############################################################################
+if DEMO_SAMPLE_RATE:
+    capture_rate = 40 / windowperiod    # capture at 40 samples per chip
+    sample_rate_snrs = np.arange(-20, 1, 4)
+    sample_rate_BERs = {}
+    for name, spc, carrier in (('2 samples per chip, baseband', 2, 0),
+                               ('capture rate', None, fc)):
+        rate_signal = uavs.UAVSignal(m1.copy(), pn_code1, capture_rate, carrier, pn_width, windowperiod, spc)
+        sample_rate_BERs[name] = []
+        for snr in sample_rate_snrs:
+            num_wrong = 0
+            for trial in range(20):
+                rate_signal.modulate(SNR=snr)
+                num_wrong += np.sum(rate_signal.demodulate() != rate_signal.original_message)
+            sample_rate_BERs[name].append(num_wrong / (20 * len(m1)))
+
+    # simulate with noise at 10 samples per chip, go to the capture rate as an
+    # SDR would deliver it and resample back to the simulation rate to demodulate
+    rate_signal = uavs.UAVSignal(m1.copy(), pn_code1, capture_rate, fc, pn_width, windowperiod, 10)
+    sample_rate_BERs['resampled from 10 samples per chip'] = []
+    for snr in sample_rate_snrs:
+        num_wrong = 0
+        for trial in range(20):
+            rate_signal.modulate(SNR=snr)
+            rate_signal.from_capture_rate(rate_signal.to_capture_rate())
+            num_wrong += np.sum(rate_signal.demodulate() != rate_signal.original_message)
+        sample_rate_BERs['resampled from 10 samples per chip'].append(num_wrong / (20 * len(m1)))
+
+    table = PrettyTable()
+    table.field_names = ["SNR (dB)"] + list(sample_rate_BERs)
+    for i, snr in enumerate(sample_rate_snrs):
+        table.add_row([snr] + ["%.3f" % bers[i] for bers in sample_rate_BERs.values()])
+    print(table)
+
+############################################################################
+# frame a burst of packets into one bitstream, send it through a UAVSignal
+# at a few SNRs and count the frames which pass the CRC at the receiver
+############################################################################
+if DEMO_FRAMING:
+    packets = [frame1, frame2] + [uavp.UAVPacket(i, 2, 0, 0, 0, 0, i, -i, 0, 0, 0, 0) for i in range(30)]
+    sent = [uavfr.UAVFrame(p) for p in packets]
+    frame_bits = uavfr.frame_bitstream(sent)
+    for snr in (-10, -5, 0):
+        framed_signal = uavs.UAVSignal(frame_bits.copy(), pn_code1, Fs, fc, pn_width, windowperiod, samples_per_chip)
+        framed_signal.modulate(SNR=snr)
+        received, num_bad = uavfr.deframe_bitstream(framed_signal.demodulate())
+        # lost frames shift the order, so match every received frame to the sent ones
+        num_correct = sum(any(f.verify(r) for f in sent) for r in received)
+        print("SNR %d dB: %d of %d frames received, %d correct, %d failed the CRC"
+              % (snr, len(received), len(packets), num_correct, num_bad))
+
 ############################################################################
 # demonstrate CDMA by adding a second signal to the first signal
 ############################################################################
@@ -115,7 +211,7 @@ plt.title("BER vs SNR")
 fooframe = uavp.UAVPacket(0, 1, 11, 2, 3, 4, 8, 7, -35, -2, 0, -1)
 foo = fooframe.get_message()
 foocode = fooframe.get_pn_code(mbits=pn_width)
-foo = uavs.UAVSignal(foo, foocode, Fs, fc, pn_width, windowperiod)
+foo = uavs.UAVSignal(foo, foocode, Fs, fc, pn_width, windowperiod, samples_per_chip)
 foosignal = foo.modulate()
 
 # demonstrate CDMA with the foo signal and the original signal
@@ -142,7 +238,7 @@ if DEMO_CAPACITY:
         m = frame.get_message()
         pn_code = frame.get_pn_code(mbits=pn_width)
         pn_code = np.random.randint(0, 2, pn_width)
-        signal = uavs.UAVSignal(m, pn_code, Fs, fc, pn_width, windowperiod)
+        signal = uavs.UAVSignal(m, pn_code, Fs, fc, pn_width, windowperiod, samples_per_chip)
         return frame, signal
 
     BERs = []
@@ -189,7 +285,7 @@ if DEMO_CAPACITY:
 fooframe = uavp.UAVPacket(0, 1, 11, 2, 3, 4, 8, 7, -35, -2, 0, -1)
 foo = fooframe.get_message()
 foocode = fooframe.get_pn_code(mbits=pn_width)
-foo = uavs.UAVSignal(foo, foocode, Fs, fc, pn_width, windowperiod)
+foo = uavs.UAVSignal(foo, foocode, Fs, fc, pn_width, windowperiod, samples_per_chip)
 foosignal = foo.modulate()
 
 # demonstrate CDMA with the foo signal and the original signal
@@ -0,0 +1,255 @@
+###############################################################################
+# File: uav_channel.py
+# Author: agent
+# Date: 10/19/2026
+# Revision: 1.0
+# Description: This file contains the channel models of the UAV protocol. A
+#              Channel is a pipeline of composable stages working on batched
+#              (trials x users x samples) waveforms: per-user path loss from
+#              distance, Rayleigh/Rician block fading, Doppler and carrier
+#              frequency offset, the superposition of the users and AWGN at
+#              the receiver. Fading gains and Doppler phasors are computed
+#              once and reused across trials so realistic channel studies run
+#              at close to the speed of the plain AWGN path.
+###############################################################################
+
+import numpy as np
+from scipy import signal
+
+SPEED_OF_LIGHT = 299792458.0
+
+
+class PathLoss:
+    '''Per-user path loss from distance.
+
+        Parameters
+        ----------
+        distances : ndarray
+            Distance of every user in meters, shape (users,) or
+            (trials, users) for users moving between trials.
+        exponent : float
+            Path loss exponent, 2 is free space. The default is 2.
+        reference_distance : float
+            Distance in meters with no loss. The default is 1.
+        '''
+    per_user = True
+    analytic = False
+
+    def __init__(self, distances, exponent=2.0, reference_distance=1.0):
+        distances = np.maximum(np.asarray(distances, dtype=float), reference_distance)
+        # amplitude gain, the power falls off with distance**exponent
+        self.gains = (distances / reference_distance) ** (-exponent / 2)
+
+    def power_gain(self, trials):
+        '''Returns the power gain of every user, shape (users,) or (trials, users).'''
+        if self.gains.ndim == 1:
+            return self.gains**2
+        return self.gains[trials % len(self.gains)]**2
+
+    def apply(self, x, trials):
+        '''Scale every user of the (trials x users x samples) batch x.'''
+        if self.gains.ndim == 1:
+            return x * self.gains[:, np.newaxis]
+        return x * self.gains[trials % len(self.gains)][:, :, np.newaxis]
+
+
+class BlockFading:
+    '''Rayleigh or Rician block fading. The gain of every user is constant
+        for block_length samples. The gains of realizations trials are drawn
+        once and trial i uses realization i % realizations.
+
+        Parameters
+        ----------
+        num_users : int
+            Number of users.
+        num_samples : int
+            Number of samples per user.
+        block_length : int
+            Number of samples with the same gain.
+        k_factor : float
+            Rician K factor, the power of the line of sight path over the
+            scattered paths. 0 is Rayleigh fading. The default is 0.
+        realizations : int
+            Number of precomputed fading realizations. The default is 64.
+        phase : bool
+            Whether the phase of the gain is applied. With False only the
+            envelope is applied, which models a receiver with perfect phase
+            recovery. The default is False.
+        seed : int
+            Seed of the random generator. The default is None.
+        '''
+    per_user = True
+
+    def __init__(self, num_users, num_samples, block_length, k_factor=0.0, realizations=64,
+                 phase=False, seed=None):
+        rng = np.random.default_rng(seed)
+        self.block_length = block_length
+        self.num_samples = num_samples
+        self.analytic = phase
+        num_blocks = -(-num_samples // block_length)
+        shape = (realizations, num_users, num_blocks)
+        scattered = (rng.standard_normal(shape) + 1j * rng.standard_normal(shape)) / np.sqrt(2)
+        line_of_sight = np.exp(2j * np.pi * rng.random((realizations, num_users, 1)))
+        self.gains = np.sqrt(k_factor / (k_factor + 1)) * line_of_sight + \
+            np.sqrt(1 / (k_factor + 1)) * scattered
+        if not phase:
+            self.gains = np.abs(self.gains)
+
+    def power_gain(self, trials):
+        '''Returns the mean power gain E|h|**2 = 1 of the fading, the noise
+            floor does not follow the fades.'''
+        return 1.0
+
+    def apply(self, x, trials):
+        '''Fade every user of the (trials x users x samples) batch x.'''
+        gains = self.gains[trials % len(self.gains)]
+        N = x.shape[-1]
+        if N % self.block_length == 0:
+            # multiply block by block without expanding the gains
+            shape = x.shape[:-1] + (N // self.block_length, self.block_length)
+            return (x.reshape(shape) * gains[..., :shape[-2], np.newaxis]).reshape(x.shape)
+        return x * np.repeat(gains, self.block_length, axis=-1)[..., :N]
+
+
+class Doppler:
+    '''Doppler shift and carrier frequency offset of every user. The phasors
+        are computed once for all trials.
+
+        Parameters
+        ----------
+        velocities : ndarray
+            Radial velocity of every user in m/s, positive towards the
+            receiver.
+        carrier_frequency : float
+            Carrier frequency of the real link in Hz, e.g. 900e6.
+        sample_rate : float
+            Sample rate of the simulated waveform in Hz.
+        num_samples : int
+            Number of samples per user.
+        cfo : ndarray
+            Additional carrier frequency offset of every user in Hz. The
+            default is 0.
+        '''
+    per_user = True
+    analytic = True
+
+    def __init__(self, velocities, carrier_frequency, sample_rate, num_samples, cfo=0.0):
+        velocities = np.atleast_1d(np.asarray(velocities, dtype=float))
+        self.offsets = velocities / SPEED_OF_LIGHT * carrier_frequency + cfo
+        n = np.arange(num_samples)
+        self.phasors = np.exp(2j * np.pi * self.offsets[:, np.newaxis] * n / sample_rate)
+
+    def power_gain(self, trials):
+        '''Returns 1, a frequency shift does not change the power.'''
+        return 1.0
+
+    def apply(self, x, trials):
+        '''Shift every user of the analytic (trials x users x samples) batch x.'''
+        return x * self.phasors[:, :x.shape[-1]]
+
+
+class AWGN:
+    '''Additive white Gaussian noise at the receiver.
+
+        Parameters
+        ----------
+        snr : float
+            SNR in dB relative to the received power of reference_user before
+            fading, i.e. after path loss with the mean fading power, so the
+            noise floor does not move with the fades.
+        reference_user : int
+            The user the SNR is relative to. None makes it relative to the
+            total received power of all users. The default is 0.
+        seed : int
+            Seed of the random generator. The default is None.
+        '''
+    per_user = False
+    analytic = False
+
+    def __init__(self, snr, reference_user=0, seed=None):
+        self.snr = snr
+        self.reference_user = reference_user
+        self.rng = np.random.default_rng(seed)
+
+    def apply(self, y, trials, user_power, total_power):
+        '''Add noise to the received (trials x samples) batch y.
+            user_power : ndarray
+                (trials x users) mean received power of every user.
+            total_power : ndarray
+                (trials,) mean received power of all users.'''
+        power = total_power if self.reference_user is None else user_power[:, self.reference_user]
+        sigma = np.sqrt(power / 10**(self.snr / 10))
+        return y + sigma[:, np.newaxis] * self.rng.standard_normal(y.shape)
+
+
+class Channel:
+    '''A pipeline of channel stages.
+
+        The per-user stages (PathLoss, BlockFading, Doppler) are applied to
+        every user in the order given, then the users are added together and
+        the receiver stages (AWGN) are applied. Stages which change the
+        phase work on the analytic signal, which is only formed when one of
+        the stages needs it. Every per-user stage reports its power gain so
+        the receiver stages see the mean received power, e.g. path loss
+        without the fades.
+
+        Parameters
+        ----------
+        stages : list
+            The channel stages.
+        '''
+    def __init__(self, stages):
+        self.stages = list(stages)
+        self.user_stages = [s for s in self.stages if s.per_user]
+        self.receiver_stages = [s for s in self.stages if not s.per_user]
+        self.analytic = any(s.analytic for s in self.user_stages)
+        self.trial = 0
+
+    def apply(self, x, num_trials=None, trials=None, combine=True):
+        '''Pass waveforms through the channel.
+            x : ndarray
+                Waveforms of shape (trials x users x samples), or
+                (users x samples) which is reused for num_trials trials.
+            num_trials : int
+                Number of trials for a 2D x. The default is 1.
+            trials : ndarray
+                Index of every trial, selecting the fading realization. The
+                default continues from the previous call.
+            combine : bool
+                Whether to add the users together. The default is True.
+
+            Returns
+            -------
+            y : ndarray
+                The received (trials x samples) batch, or (trials x users x
+                samples) if combine is False.'''
+        x = np.asarray(x)
+        # power of every user before the channel, (users,) or (trials, users)
+        power = np.mean(x**2, axis=-1)
+        # the analytic signal of a 2D x is formed once for all trials
+        if self.analytic:
+            x = signal.hilbert(x, axis=-1)
+        if x.ndim == 2:
+            x = np.broadcast_to(x, (num_trials or 1,) + x.shape)
+        T = x.shape[0]
+        if trials is None:
+            trials = np.arange(self.trial, self.trial + T)
+            self.trial += T
+        trials = np.asarray(trials)
+
+        for stage in self.user_stages:
+            x = stage.apply(x, trials)
+            power = power * stage.power_gain(trials)
+        if self.analytic:
+            x = x.real
+        if not combine:
+            return np.ascontiguousarray(x)
+
+        y = x.sum(axis=1)
+        if self.receiver_stages:
+            # the noise is set by the mean received power, not the faded one
+            user_power = np.broadcast_to(power, (T, x.shape[1]))
+            total_power = user_power.sum(axis=1)
+            for stage in self.receiver_stages:
+                y = stage.apply(y, trials, user_power, total_power)
+        return y
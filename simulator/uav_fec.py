@@ -0,0 +1,214 @@
+###############################################################################
+# File: uav_fec.py
+# Author: agent
+# Date: 10/19/2026
+# Revision: 1.0
+# Description: This file contains the forward error correction stage of the
+#              UAV protocol. It sits between UAVPacket.get_message() and
+#              UAVSignal: the message bits are encoded before spreading and
+#              the correlator outputs of UAVSignal.demodulate() are decoded
+#              after despreading. A Hamming(7,4) block code and a rate 1/2,
+#              constraint length 7 convolutional code with a vectorized
+#              soft decision Viterbi decoder are provided. Both operate on
+#              (packets x bits) batches.
+###############################################################################
+
+import numpy as np
+
+
+def _as_batch(bits):
+    '''Returns bits as a 2D (packets x bits) array and whether it was 1D.'''
+    bits = np.asarray(bits)
+    return np.atleast_2d(bits), bits.ndim == 1
+
+
+def _soft(received):
+    '''Converts received values to soft values where a positive value is a 1.
+        Integer (or boolean) input holds hard decisions, 0/1 or -1/+1, and
+        its 0s are mapped to -1. Float input, e.g. correlator outputs or the
+        -1/+1 of UAVSignal.demodulate(), is used as it is.'''
+    received = np.asarray(received)
+    if received.dtype.kind in 'biu':
+        return np.where(received == 0, -1.0, received.astype(float))
+    return received.astype(float)
+
+
+class HammingCode:
+    '''Hamming(7,4) block code with maximum likelihood soft decoding.
+
+        Attributes
+        ----------
+        n : int
+            Code word length.
+        k : int
+            Number of data bits per code word.
+        rate : float
+            Code rate k/n.
+        '''
+    n = 7
+    k = 4
+    rate = 4 / 7
+
+    def __init__(self):
+        parity = np.array([[1, 1, 0],
+                           [1, 0, 1],
+                           [0, 1, 1],
+                           [1, 1, 1]])
+        self.generator = np.hstack((np.eye(4, dtype=int), parity))
+        # all 16 data words and their code words for the ML decoder
+        self.data_words = (np.arange(16)[:, np.newaxis] >> np.arange(3, -1, -1)) & 1
+        self.code_words = self.data_words @ self.generator % 2
+        self.code_signs = 2 * self.code_words - 1
+
+    def encoded_length(self, length):
+        '''Returns the number of coded bits for a message of length bits.'''
+        return -(-length // self.k) * self.n
+
+    def encode(self, bits):
+        '''Encodes a message.
+            bits : ndarray
+                A message of 0s and 1s, or a (packets x bits) batch. The
+                message is zero padded to a multiple of 4 bits.
+
+            Returns
+            -------
+            coded : ndarray'''
+        bits, flat = _as_batch(bits)
+        packets, length = bits.shape
+        padded = np.zeros((packets, -(-length // self.k) * self.k), dtype=int)
+        padded[:, :length] = bits
+        coded = padded.reshape(packets, -1, self.k) @ self.generator % 2
+        coded = coded.reshape(packets, -1)
+        return coded[0] if flat else coded
+
+    def decode(self, received, length=None):
+        '''Decodes received code words.
+            received : ndarray
+                Hard decisions as integers (0/1 or -1/+1) or soft values as
+                floats, positive meaning a 1, as a 1D array or a (packets x bits)
+                batch.
+            length : int
+                Number of message bits to return. The default is all decoded
+                bits including padding.
+
+            Returns
+            -------
+            bits : ndarray
+                The decoded message of 0s and 1s.'''
+        received, flat = _as_batch(_soft(received))
+        packets = received.shape[0]
+        blocks = received.reshape(packets, -1, self.n)
+        # correlate every block against every code word and keep the best
+        best = np.argmax(blocks @ self.code_signs.T, axis=2)
+        bits = self.data_words[best].reshape(packets, -1)
+        if length is not None:
+            bits = bits[:, :length]
+        return bits[0] if flat else bits
+
+
+class ConvolutionalCode:
+    '''Rate 1/2 convolutional code with a soft decision Viterbi decoder.
+
+        The encoder is terminated with K-1 zero tail bits so every message
+        starts and ends in the all zero state.
+
+        Parameters
+        ----------
+        generators : tuple
+            The generator polynomials in octal notation. The default is the
+            common (171, 133) constraint length 7 code.
+        constraint_length : int
+            The constraint length K of the code. The default is 7.
+
+        Attributes(other than parameters)
+        ----------
+        rate : float
+            Code rate of the code without the tail bits.
+        '''
+    rate = 1 / 2
+
+    def __init__(self, generators=(0o171, 0o133), constraint_length=7):
+        self.generators = generators
+        self.K = constraint_length
+        self.num_states = 1 << (self.K - 1)
+        # taps[i, j] is the tap of generator i on the input delayed by j
+        self.taps = np.array([[(g >> (self.K - 1 - j)) & 1 for j in range(self.K)]
+                              for g in generators])
+        # the register holds the newest input in the MSB and the state in
+        # the lower K-1 bits, the next state drops the oldest bit. For every
+        # next state there are two previous states which differ in that bit.
+        next_states = np.arange(self.num_states)
+        self.prev_states = np.empty((self.num_states, 2), dtype=int)
+        outputs = np.empty((self.num_states, 2, len(generators)), dtype=int)
+        for x in range(2):
+            registers = ((next_states << 1) | x)
+            self.prev_states[:, x] = registers & (self.num_states - 1)
+            for i, g in enumerate(generators):
+                outputs[:, x, i] = [bin(r & g).count('1') & 1 for r in registers]
+        self.input_bits = next_states >> (self.K - 2)
+        self.output_signs = (2 * outputs - 1).reshape(-1, len(generators)).T
+
+    def encoded_length(self, length):
+        '''Returns the number of coded bits for a message of length bits.'''
+        return (length + self.K - 1) * len(self.generators)
+
+    def encode(self, bits):
+        '''Encodes a message.
+            bits : ndarray
+                A message of 0s and 1s, or a (packets x bits) batch.
+
+            Returns
+            -------
+            coded : ndarray
+                The coded bits with the outputs of each generator interleaved.'''
+        bits, flat = _as_batch(bits)
+        packets, length = bits.shape
+        # pad K-1 zeros in front for the initial state and behind for the tail
+        padded = np.zeros((packets, length + 2 * (self.K - 1)), dtype=int)
+        padded[:, self.K - 1:self.K - 1 + length] = bits
+        steps = length + self.K - 1
+        coded = np.zeros((packets, steps, len(self.generators)), dtype=int)
+        for j in range(self.K):
+            delayed = padded[:, self.K - 1 - j:self.K - 1 - j + steps]
+            coded ^= delayed[:, :, np.newaxis] * self.taps[:, j]
+        coded = coded.reshape(packets, -1)
+        return coded[0] if flat else coded
+
+    def decode(self, received, length=None):
+        '''Decodes a received message with the Viterbi algorithm.
+            received : ndarray
+                Hard decisions as integers (0/1 or -1/+1) or soft values as
+                floats, positive meaning a 1, as a 1D array or a (packets x bits)
+                batch.
+            length : int
+                Number of message bits to return. The default is all bits
+                except the tail.
+
+            Returns
+            -------
+            bits : ndarray
+                The decoded message of 0s and 1s.'''
+        received, flat = _as_batch(_soft(received))
+        packets = received.shape[0]
+        received = received.reshape(packets, -1, len(self.generators))
+        steps = received.shape[1]
+
+        metrics = np.full((packets, self.num_states), -np.inf)
+        metrics[:, 0] = 0
+        decisions = np.empty((steps, packets, self.num_states), dtype=np.uint8)
+        rows = np.arange(packets)[:, np.newaxis]
+        for t in range(steps):
+            # branch metric is the correlation with the expected output
+            branch = (received[:, t] @ self.output_signs).reshape(packets, self.num_states, 2)
+            candidates = metrics[:, self.prev_states] + branch
+            decisions[t] = np.argmax(candidates, axis=2)
+            metrics = np.take_along_axis(candidates, decisions[t][:, :, np.newaxis].astype(np.intp), axis=2)[:, :, 0]
+
+        # trace back from the all zero state the tail drove the encoder into
+        bits = np.empty((packets, steps), dtype=int)
+        state = np.zeros(packets, dtype=int)
+        for t in range(steps - 1, -1, -1):
+            bits[:, t] = self.input_bits[state]
+            state = self.prev_states[state, decisions[t][rows[:, 0], state]]
+        bits = bits[:, :steps - (self.K - 1) if length is None else length]
+        return bits[0] if flat else bits
@@ -2,72 +2,428 @@
 # File: uav_frame.py
 # Author: Daniel Nybo
 # Date: 4/14/2022
-# Revision: 1.0
+# Revision: 2.0
 # Description: This file contains the UAVFrame class, which is used to create
-#              a frame for the UAV protocol. The frame is a binary message
-#              that is sent over the air. The frame is created by the UAV
-#              protocol and is used to send data between UAVs and controllers.
-#              This is meant to operate as an encryption layer for the UAV
-#              protocol, but is not yet implemented as of revision 1.0.
+#              a frame for the UAV protocol. The frame wraps the bytes of a
+#              UAVPacket with networking information (priority, source and
+#              destination), a table-driven CRC-16 or CRC-32 checksum and
+#              HDLC style 0x7E flags with byte stuffing. The module also
+#              provides batch functions for framing many packets into one
+#              contiguous bitstream and for deframing a received bitstream
+#              in a single pass.
 ###############################################################################
 
 import numpy as np
+import uav_packet as uavp
+
+FLAG = 0x7E             # frame delimiter
+ESCAPE = 0x7D           # control escape for byte stuffing
+ESCAPE_XOR = 0x20       # value xor'ed with an escaped byte
+ENCRYPTION_KEY = 0x55   # key for the basic xor encryption of the payload
+HEADER_LENGTH = 4       # length, priority, source, destination
+PACKET_LENGTH = 12      # number of bytes in a plain UAVPacket
+
+
+def _make_crc_table(poly, width, reflected):
+    '''Build the 256 entry lookup table for a byte-wise CRC.
+        poly : int
+            The generator polynomial (reversed if reflected is True).
+        width : int
+            The width of the CRC in bits.
+        reflected : bool
+            Whether the CRC is processed LSB first.
+
+        Returns
+        -------
+        table : ndarray'''
+    mask = (1 << width) - 1
+    table = np.zeros(256, dtype=np.uint32)
+    for byte in range(256):
+        if reflected:
+            crc = byte
+            for _ in range(8):
+                crc = (crc >> 1) ^ poly if crc & 1 else crc >> 1
+        else:
+            crc = byte << (width - 8)
+            for _ in range(8):
+                crc = (crc << 1) ^ poly if crc & (1 << (width - 1)) else crc << 1
+        table[byte] = crc & mask
+    return table
+
+
+# CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF) and the standard CRC-32
+CRC16_TABLE = _make_crc_table(0x1021, 16, reflected=False)
+CRC32_TABLE = _make_crc_table(0xEDB88320, 32, reflected=True)
+_CRC16_LIST = CRC16_TABLE.tolist()
+_CRC32_LIST = CRC32_TABLE.tolist()
+
+# checksum name -> number of checksum bytes appended to the frame
+CHECKSUMS = {'crc16': 2, 'crc32': 4}
+
+
+def crc_rows(data, checksum='crc16'):
+    '''Compute the CRC of every row of a 2D byte array at once.
+        The table lookup walks the columns, so the python loop runs once per
+        byte position rather than once per byte of every frame.
+        data : ndarray
+            A (frames x bytes) uint8 array.
+        checksum : str
+            'crc16' or 'crc32'.
+
+        Returns
+        -------
+        crc : ndarray
+            One CRC value per row.'''
+    data = np.atleast_2d(np.asarray(data, dtype=np.uint8))
+    if checksum == 'crc16':
+        crc = np.full(data.shape[0], 0xFFFF, dtype=np.uint32)
+        for column in data.T:
+            index = ((crc >> 8) ^ column) & 0xFF
+            crc = ((crc << 8) & 0xFFFF) ^ CRC16_TABLE[index]
+        return crc
+    elif checksum == 'crc32':
+        crc = np.full(data.shape[0], 0xFFFFFFFF, dtype=np.uint32)
+        for column in data.T:
+            crc = (crc >> 8) ^ CRC32_TABLE[(crc ^ column) & 0xFF]
+        return crc ^ np.uint32(0xFFFFFFFF)
+    raise ValueError("unknown checksum '%s', expected one of %s" % (checksum, list(CHECKSUMS)))
+
+
+def crc(data, checksum='crc16'):
+    '''Compute the CRC of a single byte sequence.
+        Returns
+        -------
+        crc : int'''
+    # plain python lookups beat numpy for a single short frame
+    data = bytes(np.asarray(data, dtype=np.uint8))
+    if checksum == 'crc16':
+        table = _CRC16_LIST
+        value = 0xFFFF
+        for byte in data:
+            value = ((value << 8) & 0xFFFF) ^ table[(value >> 8) ^ byte]
+        return value
+    elif checksum == 'crc32':
+        table = _CRC32_LIST
+        value = 0xFFFFFFFF
+        for byte in data:
+            value = (value >> 8) ^ table[(value ^ byte) & 0xFF]
+        return value ^ 0xFFFFFFFF
+    raise ValueError("unknown checksum '%s', expected one of %s" % (checksum, list(CHECKSUMS)))
+
+
+def _crc_bytes(crcs, checksum):
+    '''Split an array of CRC values into big endian bytes (frames x n).'''
+    n = CHECKSUMS[checksum]
+    shifts = np.arange(8 * (n - 1), -1, -8, dtype=np.uint32)
+    return ((crcs[:, np.newaxis] >> shifts) & 0xFF).astype(np.uint8)
+
+
+def _crc_grouped(bodies, checksum):
+    '''Compute the CRC of a list of byte arrays, batching equal lengths.'''
+    crcs = np.zeros(len(bodies), dtype=np.uint32)
+    lengths = np.array([len(b) for b in bodies])
+    for length in np.unique(lengths):
+        index = np.flatnonzero(lengths == length)
+        crcs[index] = crc_rows(np.stack([bodies[i] for i in index]), checksum)
+    return crcs
+
+
+def stuff(data):
+    '''HDLC byte stuffing: every FLAG or ESCAPE byte is replaced by ESCAPE
+        followed by the byte xor'ed with ESCAPE_XOR.
+        data : ndarray
+            uint8 array to be stuffed.
+
+        Returns
+        -------
+        stuffed : ndarray'''
+    data = np.asarray(data, dtype=np.uint8)
+    special = (data == FLAG) | (data == ESCAPE)
+    stuffed = np.repeat(data, 1 + special)
+    # position of each escape in the output is its input position plus the
+    # number of escapes inserted before it
+    escapes = np.flatnonzero(special)
+    escapes = escapes + np.arange(len(escapes))
+    stuffed[escapes] = ESCAPE
+    stuffed[escapes + 1] ^= ESCAPE_XOR
+    return stuffed
+
+
+def unstuff(data):
+    '''Reverse HDLC byte stuffing.
+        data : ndarray
+            uint8 array without FLAG bytes.
+
+        Returns
+        -------
+        data : ndarray
+            The unstuffed bytes, or None if the sequence ends on an ESCAPE.'''
+    data = np.array(data, dtype=np.uint8)
+    escapes = np.flatnonzero(data == ESCAPE)
+    if len(escapes) and escapes[-1] == len(data) - 1:
+        return None
+    data[escapes + 1] ^= ESCAPE_XOR
+    return np.delete(data, escapes)
 
 
 class UAVFrame:
-    def __init__(self, frame_length, frame_packet,  frame_priority, 
-                 frame_source, frame_destination):
-        self.frame_length = frame_length
+    '''A frame for the UAV protocol wrapping a UAVPacket.
+
+        The frame is sent over the air as:
+            FLAG | LENGTH | PRIORITY | SOURCE | DESTINATION | PAYLOAD | CRC | FLAG
+        with every byte between the flags byte stuffed. The CRC covers the
+        header and the (optionally encrypted) payload.
+
+        Parameters
+        ----------
+        frame_packet : UAVPacket
+            The packet carried by the frame.
+        frame_priority : int
+            Priority of the frame, 0 - 255. The default is 0.
+        frame_source : int
+            Address of the sending node, 0 - 255. The default is 0.
+        frame_destination : int
+            Address of the receiving node, 0 - 255. The default is 0.
+        checksum : str
+            'crc16' or 'crc32'. The default is 'crc16'.
+        encrypted : bool
+            Whether the payload is encrypted on the air. The default is False.
+
+        Attributes(other than parameters)
+        ----------
+        frame_length : int
+            Number of payload bytes.
+        frame_checksum : int
+            The CRC of the frame.
+        frame_message : ndarray
+            The frame as a bitstream of 0s and 1s, including flags.
+        '''
+    def __init__(self, frame_packet, frame_priority=0, frame_source=0,
+                 frame_destination=0, checksum='crc16', encrypted=False):
+        if checksum not in CHECKSUMS:
+            raise ValueError("unknown checksum '%s', expected one of %s" % (checksum, list(CHECKSUMS)))
+        for name, value in (('frame_priority', frame_priority), ('frame_source', frame_source),
+                            ('frame_destination', frame_destination)):
+            if not 0 <= value <= 255:
+                raise ValueError("%s must be 0 - 255, got %d" % (name, value))
+        self.frame_packet = frame_packet
         self.frame_priority = frame_priority
         self.frame_source = frame_source
         self.frame_destination = frame_destination
-        self.frame_start = 0x7E
-        self.frame_end = 0x7E
-        self.frame_packet = frame_packet
-        self.frame_packet_encrypted = 0
+        self.checksum = checksum
+        self.encrypted = encrypted
+        self.frame_start = FLAG
+        self.frame_end = FLAG
+        payload = frame_packet.get_bytes()
+        if len(payload) > 255:
+            raise ValueError("packet of %d bytes does not fit in a frame" % len(payload))
+        self.frame_length = len(payload)
+        self.frame_packet_encrypted = self.encrypt(payload) if encrypted else payload
         self.frame_checksum = self.create_checksum()
-        self.frame_message = self.create_message()
-    
-    # create a method for creating a checksum
+        self.frame_message = None
+
+    @classmethod
+    def _assemble(cls, packet, header, payload, frame_checksum, checksum, encrypted):
+        '''Creates a frame from its header, (encrypted) payload and CRC, which
+            are already known, without serializing the packet or computing the
+            CRC again.'''
+        frame = cls.__new__(cls)
+        frame.frame_packet = packet
+        frame.frame_length = int(header[0])
+        frame.frame_priority = int(header[1])
+        frame.frame_source = int(header[2])
+        frame.frame_destination = int(header[3])
+        frame.checksum = checksum
+        frame.encrypted = encrypted
+        frame.frame_start = FLAG
+        frame.frame_end = FLAG
+        frame.frame_packet_encrypted = payload
+        frame.frame_checksum = int(frame_checksum)
+        frame.frame_message = None
+        return frame
+
+    def get_header(self):
+        '''Returns the header bytes of the frame.'''
+        return np.array([self.frame_length, self.frame_priority, self.frame_source,
+                         self.frame_destination], dtype=np.uint8)
+
+    def get_body(self):
+        '''Returns the header and the payload as sent on the air.'''
+        return np.concatenate((self.get_header(), self.frame_packet_encrypted))
+
     def create_checksum(self):
-        self.frame_checksum = self.frame_length + self.frame_packet + \
-            self.frame_priority + self.frame_source + self.frame_destination
+        '''Computes the CRC over the header and payload.'''
+        self.frame_checksum = crc(self.get_body(), self.checksum)
         return self.frame_checksum
-    
-    def encrypt(self):
-        # encrypt frame_packet with a basic hash/unhash algorithm
-        # for now, just XOR with 0x55555555555
-        self.frame_packet_encrypted = self.frame_packet ^ 0x55555555555
-        return self.frame_packet_encrypted
-    
+
+    def encrypt(self, payload=None):
+        '''Encrypt the payload with a basic xor against ENCRYPTION_KEY.'''
+        if payload is None:
+            payload = self.frame_packet.get_bytes()
+        return np.asarray(payload, dtype=np.uint8) ^ np.uint8(ENCRYPTION_KEY)
+
     def decrypt(self, frame_packet_encrypted=None):
-        # decrypt frame_packet with a basic hash/unhash algorithm
-        # for now, just XOR with 0x55555555555
-        self.frame_packet = self.frame_packet_encrypted ^ 0x55555555555
-        return self.frame_packet
-    
-    # create a method for creating a binary message of the frame
+        '''Decrypt the payload with a basic xor against ENCRYPTION_KEY.'''
+        if frame_packet_encrypted is None:
+            frame_packet_encrypted = self.frame_packet_encrypted
+        return np.asarray(frame_packet_encrypted, dtype=np.uint8) ^ np.uint8(ENCRYPTION_KEY)
+
+    def get_bytes(self):
+        '''Returns the stuffed frame bytes including both flags.'''
+        body = np.concatenate((self.get_body(), _crc_bytes(np.array([self.frame_checksum], dtype=np.uint32), self.checksum)[0]))
+        return np.concatenate(([FLAG], stuff(body), [FLAG])).astype(np.uint8)
+
     def create_message(self):
-        # convert each frame element to binary and concatenate
-        self.frame_message = np.concatenate((np.binary_repr(self.frame_start, width=8),
-                                                np.binary_repr(self.frame_length, width=8),
-                                                self.frame_packet_encrypted,
-                                                np.binary_repr(self.frame_priority, width=8),
-                                                np.binary_repr(self.frame_source, width=8),
-                                                np.binary_repr(self.frame_destination, width=8),
-                                                np.binary_repr(self.frame_checksum, width=8),
-                                                np.binary_repr(self.frame_end, width=8)))
+        '''Creates the binary message of the frame.
+            Returns
+            -------
+            frame_message : ndarray
+                The frame as an array of 0s and 1s.'''
+        self.frame_message = np.unpackbits(self.get_bytes()).astype(int)
         return self.frame_message
-    
 
-    
+    def verify(self, received):
+        '''Check that a received frame matches this one.
+            Parameters
+            ----------
+            received : UAVFrame
+                A frame returned by deframe_bitstream().
+
+            Returns
+            -------
+            bool'''
+        return (self.frame_priority == received.frame_priority and
+                self.frame_source == received.frame_source and
+                self.frame_destination == received.frame_destination and
+                self.frame_checksum == received.frame_checksum and
+                np.array_equal(self.frame_packet.get_bytes(), received.frame_packet.get_bytes()))
+
+
+def frame_bitstream(frames, checksum='crc16', encrypted=False):
+    '''Frame many packets into one contiguous bitstream.
+        frames : list
+            UAVFrame objects, or UAVPacket objects which are wrapped in a
+            UAVFrame with default addressing using checksum and encrypted.
+        checksum : str
+            The checksum for packets which are not already framed.
+        encrypted : bool
+            Whether to encrypt packets which are not already framed.
+
+        Returns
+        -------
+        bits : ndarray
+            The frames back to back as an array of 0s and 1s.'''
+    if checksum not in CHECKSUMS:
+        raise ValueError("unknown checksum '%s', expected one of %s" % (checksum, list(CHECKSUMS)))
+    if len(frames) == 0:
+        return np.array([], dtype=int)
+    bodies_crc = [None] * len(frames)
+    packets = []
+    for i, f in enumerate(frames):
+        if isinstance(f, UAVFrame):
+            # framed already, the CRC was computed by the frame
+            crc_bytes = _crc_bytes(np.array([f.frame_checksum], dtype=np.uint32), f.checksum)[0]
+            bodies_crc[i] = np.concatenate((f.get_body(), crc_bytes))
+        else:
+            packets.append(i)
+    if packets:
+        # build the bodies of the packets with default addressing and
+        # checksum them in batches of equal length
+        bodies = []
+        for i in packets:
+            payload = frames[i].get_bytes()
+            if len(payload) > 255:
+                raise ValueError("packet of %d bytes does not fit in a frame" % len(payload))
+            if encrypted:
+                payload = payload ^ np.uint8(ENCRYPTION_KEY)
+            bodies.append(np.concatenate(([len(payload), 0, 0, 0], payload)).astype(np.uint8))
+        crcs = _crc_bytes(_crc_grouped(bodies, checksum), checksum)
+        for i, body, b in zip(packets, bodies, crcs):
+            bodies_crc[i] = np.concatenate((body, b))
+
+    data = np.concatenate(bodies_crc)
+    lengths = np.array([len(b) for b in bodies_crc])
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    ends = starts + lengths
+    stuffed = stuff(data)
+    # map frame boundaries to the stuffed stream
+    special = np.concatenate(([0], np.cumsum((data == FLAG) | (data == ESCAPE))))
+    boundaries = np.empty(2 * len(frames), dtype=np.int64)
+    boundaries[0::2] = starts + special[starts]
+    boundaries[1::2] = ends + special[ends]
+    stream = np.insert(stuffed, boundaries, FLAG)
+    return np.unpackbits(stream).astype(int)
 
-    
 
+def deframe_bitstream(bits, checksum='crc16', encrypted=False):
+    '''Recover the frames in a received bitstream.
+        Frames with a bad length or checksum are dropped.
+        bits : ndarray
+            Byte aligned array of 0s and 1s (or -1s for 0s as produced by
+            UAVSignal.demodulate()).
+        checksum : str
+            'crc16' or 'crc32'.
+        encrypted : bool
+            Whether the payloads were encrypted.
 
-    
-    
+        Returns
+        -------
+        frames : list
+            UAVFrame objects with the received packets.
+        num_bad : int
+            Number of frames which failed the length or checksum test.'''
+    if checksum not in CHECKSUMS:
+        raise ValueError("unknown checksum '%s', expected one of %s" % (checksum, list(CHECKSUMS)))
+    bits = np.asarray(bits)
+    stream = np.packbits((bits > 0).astype(np.uint8))
+    n = CHECKSUMS[checksum]
 
-        
+    # unstuff the whole stream at once, FLAG bytes are never stuffed so the
+    # frame boundaries survive
+    escapes = np.flatnonzero(stream == ESCAPE)
+    data = stream.copy()
+    data[escapes[escapes + 1 < len(data)] + 1] ^= ESCAPE_XOR
+    keep = np.ones(len(data), dtype=bool)
+    keep[escapes] = False
+    position = np.cumsum(keep) - 1
+    data = data[keep]
+    flags = np.flatnonzero(stream == FLAG)
+    starts, ends = flags[:-1] + 1, flags[1:]
+    nonempty = ends > starts
+    starts, ends = starts[nonempty], ends[nonempty]
+    # a segment ending on an ESCAPE cannot be unstuffed
+    broken = stream[ends - 1] == ESCAPE
+    body_starts = position[starts - 1] + 1
+    body_ends = position[ends]
+    lengths = body_ends - body_starts
+    good = ~broken & (lengths >= HEADER_LENGTH + n)
+    good[good] = data[body_starts[good]] == lengths[good] - HEADER_LENGTH - n
+    num_bad = int(np.sum(~good))
+    body_starts, lengths = body_starts[good], lengths[good]
+    if len(lengths) == 0:
+        return [], num_bad
 
+    # check the CRCs in batches of frames of equal length
+    valid = np.zeros(len(lengths), dtype=bool)
+    crcs = np.zeros(len(lengths), dtype=np.uint32)
+    for length in np.unique(lengths):
+        index = np.flatnonzero(lengths == length)
+        bodies = data[body_starts[index, np.newaxis] + np.arange(length)]
+        crcs[index] = crc_rows(bodies[:, :-n], checksum)
+        received = np.zeros(len(index), dtype=np.uint32)
+        for k in range(n):
+            received = (received << 8) | bodies[:, length - n + k]
+        valid[index] = crcs[index] == received
+    num_bad += int(np.sum(~valid))
 
+    frames = []
+    for start, length, c in zip(body_starts[valid], lengths[valid], crcs[valid]):
+        body = data[start:start + length]
+        payload = body[HEADER_LENGTH:-n]
+        plain = payload ^ np.uint8(ENCRYPTION_KEY) if encrypted else payload
+        if len(plain) > PACKET_LENGTH:
+            packet = uavp.TextPacket.from_bytes(plain)
+        else:
+            packet = uavp.UAVPacket.from_bytes(plain)
+        frames.append(UAVFrame._assemble(packet, body[:HEADER_LENGTH], payload, c, checksum, encrypted))
+    return frames, num_bad
@@ -0,0 +1,293 @@
+###############################################################################
+# File: uav_ground_station.py
+# Author: agent
+# Date: 10/19/2026
+# Revision: 1.0
+# Description: This file contains a long running ground-station receive
+#              service for the UAV protocol. Sample blocks arrive over a local
+#              TCP or unix socket standing in for the SDR. For every block the
+#              code of each registered UAV is acquired, the signal despread
+#              and the packet decoded, and the decoded UAVPacket is published
+#              to subscribers. An asyncio event loop handles the I/O, a thread
+#              or process pool runs the NumPy correlation and bounded queues
+#              provide backpressure. The service reports the sustained
+#              samples per second and the per-packet decode latency.
+###############################################################################
+
+import asyncio
+import concurrent.futures
+import struct
+import time
+
+import numpy as np
+from prettytable import PrettyTable
+from scipy import signal
+
+import uav_packet as uavp
+import uav_signal as uavs
+
+# every sample block on the wire is a little endian uint32 sample count
+# followed by that many float32 samples
+BLOCK_HEADER = struct.Struct('<I')
+
+
+class Receiver:
+    '''Acquires, despreads and decodes the signal of one registered UAV.
+
+        Parameters
+        ----------
+        uav_id : int
+            The UAV_ID of the UAV.
+        pn_code : ndarray
+            The PN code of the UAV, a list of 0s and 1s.
+        num_bits : int
+            Number of bits in a packet of the UAV. The default is 96, one
+            UAVPacket.
+        Fs, fc, bit_t, samples_per_chip
+            The signal parameters used by the UAV, see UAVSignal. The sample
+            blocks are expected at the simulation rate of samples_per_chip.
+        '''
+    def __init__(self, uav_id, pn_code, num_bits=96, Fs=900e6, fc=100, bit_t=.01, samples_per_chip=10):
+        self.uav_id = uav_id
+        self.num_bits = num_bits
+        pn_code = np.array(pn_code)
+        # build the chip waveform the same way the transmitter does
+        reference = uavs.UAVSignal(np.zeros(1, dtype=int), pn_code.copy(), Fs, fc, len(pn_code), bit_t,
+                                   samples_per_chip)
+        chips = np.where(pn_code == 0, -1, pn_code)
+        self.template = (chips[:, np.newaxis] * reference.s1[np.newaxis, :]).ravel()
+        self.samples_per_bit = len(self.template)
+
+    def acquire(self, samples):
+        '''Find the sample offset of the first bit in samples.
+            Returns
+            -------
+            offset : int
+                The offset, or None if the block is too short.'''
+        L = self.samples_per_bit
+        search = len(samples) - self.num_bits * L
+        if search < 0:
+            return None
+        corr = signal.fftconvolve(samples[:search + self.num_bits * L], self.template[::-1], mode='valid')
+        # fold the correlation over the bits, the data sign is unknown so
+        # the magnitudes are summed
+        offsets = np.arange(search + 1)
+        metric = np.zeros(search + 1)
+        for k in range(self.num_bits):
+            metric += np.abs(corr[np.minimum(offsets + k * L, len(corr) - 1)])
+        return int(np.argmax(metric))
+
+    def despread(self, samples, offset):
+        '''Returns the correlator output of every bit starting at offset.'''
+        L = self.samples_per_bit
+        bits = samples[offset:offset + self.num_bits * L].reshape(self.num_bits, L)
+        return bits @ self.template
+
+    def decode(self, samples):
+        '''Acquire, despread and decode the packet in samples.
+            Returns
+            -------
+            packet : UAVPacket
+                The decoded packet, or None if the block is too short.'''
+        offset = self.acquire(samples)
+        if offset is None:
+            return None
+        soft = self.despread(samples, offset)
+        data = np.packbits((soft > 0).astype(np.uint8))
+        if self.num_bits > 96:
+            return uavp.TextPacket.from_bytes(data)
+        return uavp.UAVPacket.from_bytes(data)
+
+
+def decode_block(receivers, samples, check_id=True):
+    '''Decode the packets of all registered UAVs in one sample block. Runs in
+        the worker pool.
+        receivers : list
+            Receiver objects.
+        samples : ndarray
+            The sample block.
+        check_id : bool
+            Only return packets whose UAV_ID matches the receiver. The
+            default is True.
+
+        Returns
+        -------
+        decoded : list
+            (uav_id, packet) tuples.'''
+    decoded = []
+    for receiver in receivers:
+        packet = receiver.decode(samples)
+        if packet is None or (check_id and packet.UAV_ID != receiver.uav_id):
+            continue
+        decoded.append((receiver.uav_id, packet))
+    return decoded
+
+
+class GroundStationService:
+    '''Asyncio ground-station receive service.
+
+        Parameters
+        ----------
+        host : str
+            Host of the TCP socket. The default is '127.0.0.1'.
+        port : int
+            Port of the TCP socket, 0 picks a free port. The default is 0.
+        path : str
+            Path of a unix socket to listen on instead of TCP. The default is
+            None.
+        workers : int
+            Number of decode workers. The default is 4.
+        executor : str
+            'thread' or 'process' pool for the decoding. The default is
+            'thread', NumPy releases the GIL in the correlation.
+        queue_size : int
+            Number of sample blocks waiting to be decoded before the socket
+            stops being read. The default is 8.
+        check_id : bool
+            Only publish packets whose UAV_ID matches the registration. The
+            default is True.
+
+        Attributes(other than parameters)
+        ----------
+        num_samples : int
+            Number of samples decoded.
+        num_blocks : int
+            Number of sample blocks decoded.
+        latencies : list
+            Time from block arrival to publishing of every decoded packet.
+        '''
+    def __init__(self, host='127.0.0.1', port=0, path=None, workers=4, executor='thread',
+                 queue_size=8, check_id=True):
+        if executor not in ('thread', 'process'):
+            raise ValueError("unknown executor '%s', expected 'thread' or 'process'" % executor)
+        self.host = host
+        self.port = port
+        self.path = path
+        self.workers = workers
+        self.executor = executor
+        self.queue_size = queue_size
+        self.check_id = check_id
+        self.receivers = []
+        self.subscribers = []
+        self.num_samples = 0
+        self.num_blocks = 0
+        self.latencies = []
+        self.blocks = None
+        self.server = None
+        self.pool = None
+        self.tasks = []
+        self.connections = set()
+        self.start_time = None
+
+    def register(self, uav_id, pn_code, num_bits=96, Fs=900e6, fc=100, bit_t=.01, samples_per_chip=10):
+        '''Register a UAV to be decoded, see Receiver.'''
+        self.receivers.append(Receiver(uav_id, pn_code, num_bits, Fs, fc, bit_t, samples_per_chip))
+
+    def subscribe(self, maxsize=64):
+        '''Returns a bounded asyncio.Queue receiving (uav_id, packet) tuples.
+            A full subscriber queue holds up the decoding.'''
+        queue = asyncio.Queue(maxsize)
+        self.subscribers.append(queue)
+        return queue
+
+    async def start(self):
+        '''Start listening and decoding.'''
+        self.blocks = asyncio.Queue(self.queue_size)
+        if self.executor == 'thread':
+            self.pool = concurrent.futures.ThreadPoolExecutor(self.workers)
+        else:
+            self.pool = concurrent.futures.ProcessPoolExecutor(self.workers)
+        self.tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+        if self.path is not None:
+            self.server = await asyncio.start_unix_server(self.handle_connection, path=self.path)
+        else:
+            self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+            self.port = self.server.sockets[0].getsockname()[1]
+        self.start_time = time.perf_counter()
+
+    async def stop(self, timeout=1.0):
+        '''Finish the queued blocks and stop the service.
+            timeout : float
+                Time in seconds open connections get to finish sending
+                before they are closed. The default is 1.'''
+        self.server.close()
+        if self.connections:
+            await asyncio.wait(self.connections, timeout=timeout)
+            for task in self.connections:
+                task.cancel()
+        await self.server.wait_closed()
+        await self.blocks.join()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.pool.shutdown()
+
+    async def handle_connection(self, reader, writer):
+        '''Read sample blocks from one connection until it closes.'''
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            while True:
+                header = await reader.readexactly(BLOCK_HEADER.size)
+                (count,) = BLOCK_HEADER.unpack(header)
+                data = await reader.readexactly(4 * count)
+                samples = np.frombuffer(data, dtype='<f4').astype(float)
+                # blocks here until a worker is free, which stops the socket
+                # from being read and pushes back on the sender
+                await self.blocks.put((time.perf_counter(), samples))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.connections.discard(task)
+            writer.close()
+
+    async def worker(self):
+        '''Decode sample blocks in the pool and publish the packets.'''
+        loop = asyncio.get_running_loop()
+        while True:
+            arrived, samples = await self.blocks.get()
+            try:
+                decoded = await loop.run_in_executor(self.pool, decode_block, self.receivers,
+                                                     samples, self.check_id)
+                for item in decoded:
+                    for queue in self.subscribers:
+                        await queue.put(item)
+                    self.latencies.append(time.perf_counter() - arrived)
+                self.num_samples += len(samples)
+                self.num_blocks += 1
+            finally:
+                self.blocks.task_done()
+
+    def samples_per_second(self):
+        '''Returns the sustained number of samples decoded per second.'''
+        elapsed = time.perf_counter() - self.start_time
+        return self.num_samples / elapsed if elapsed > 0 else 0.0
+
+    def print_stats(self):
+        '''Print the service statistics in a table format.'''
+        table = PrettyTable()
+        table.field_names = ["", "Value"]
+        table.add_row(["Blocks decoded", self.num_blocks])
+        table.add_row(["Packets published", len(self.latencies)])
+        table.add_row(["Samples per second", "%.0f" % self.samples_per_second()])
+        if self.latencies:
+            p50, p99 = np.percentile(self.latencies, (50, 99))
+            table.add_row(["Decode latency p50 (ms)", "%.2f" % (1000 * p50)])
+            table.add_row(["Decode latency p99 (ms)", "%.2f" % (1000 * p99)])
+        print(table)
+
+
+async def send_blocks(blocks, host='127.0.0.1', port=None, path=None):
+    '''Send sample blocks to a GroundStationService, standing in for the SDR.
+        blocks : iterable
+            Arrays of samples.'''
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    for samples in blocks:
+        samples = np.asarray(samples, dtype='<f4')
+        writer.write(BLOCK_HEADER.pack(len(samples)) + samples.tobytes())
+        await writer.drain()
+    writer.close()
+    await writer.wait_closed()
@@ -0,0 +1,250 @@
+###############################################################################
+# File: uav_mac.py
+# Author: agent
+# Date: 10/19/2026
+# Revision: 1.0
+# Description: This file contains the medium access control layer of the UAV
+#              protocol. Each node keeps its waiting frames in a transmit
+#              queue which decides the order they are sent in from their
+#              frame_priority: first in first out, strict priority, weighted
+#              fair queueing or earliest deadline first. Admission control
+#              limits the number of concurrent CDMA users on a ground station
+#              to what the link can carry at a target BER and keeps headroom
+#              for flight-control frames. A larger frame_priority is more
+#              urgent.
+###############################################################################
+
+import heapq
+from collections import deque
+
+import numpy as np
+
+# frame_priority of flight-control frames (CHANGE_X ... CHANGE_YAW updates)
+CONTROL_PRIORITY = 128
+
+
+class QueuedFrame:
+    '''A frame waiting in a transmit queue.'''
+    __slots__ = ('frame', 'num_bits', 'generated')
+
+    def __init__(self, frame, num_bits, generated):
+        self.frame = frame
+        self.num_bits = num_bits
+        self.generated = generated
+
+
+class FIFOQueue:
+    '''Transmit queue sending frames in the order they were generated.'''
+    def __init__(self):
+        self.entries = deque()
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def push(self, entry, now):
+        '''Add a QueuedFrame to the queue.'''
+        self.entries.append(entry)
+
+    def peek(self, now):
+        '''Returns the next QueuedFrame without removing it.'''
+        return self.entries[0] if self.entries else None
+
+    def pop(self, now):
+        '''Removes and returns the next QueuedFrame.'''
+        return self.entries.popleft() if self.entries else None
+
+
+class _HeapQueue:
+    '''Base class for transmit queues ordered by a key of each frame.
+
+        Parameters
+        ----------
+        key : callable
+            key(entry, now) returns the sort key of a QueuedFrame, smaller
+            keys are sent first.
+        '''
+    def __init__(self, key):
+        self.key = key
+        self.entries = []
+        self.sequence = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def push(self, entry, now):
+        '''Add a QueuedFrame to the queue.'''
+        # the sequence number keeps equal keys first in first out
+        heapq.heappush(self.entries, (self.key(entry, now), self.sequence, entry))
+        self.sequence += 1
+
+    def peek(self, now):
+        '''Returns the next QueuedFrame without removing it.'''
+        return self.entries[0][2] if self.entries else None
+
+    def pop(self, now):
+        '''Removes and returns the next QueuedFrame.'''
+        return heapq.heappop(self.entries)[2] if self.entries else None
+
+
+class StrictPriorityQueue(_HeapQueue):
+    '''Transmit queue always sending the frame with the highest
+        frame_priority, first in first out within a priority.'''
+    def __init__(self):
+        super().__init__(lambda entry, now: -entry.frame.frame_priority)
+
+
+class WeightedFairQueue(_HeapQueue):
+    '''Weighted fair queueing between priorities. Each priority gets a share
+        of the link proportional to its weight, measured in bits, so bulk
+        traffic cannot starve control traffic and vice versa.
+
+        Parameters
+        ----------
+        weights : dict
+            frame_priority -> weight. Priorities not in weights get
+            default_weight.
+        default_weight : float
+            The default is 1.
+        '''
+    def __init__(self, weights=None, default_weight=1.0):
+        super().__init__(self.finish_time)
+        self.weights = weights if weights is not None else {}
+        self.default_weight = default_weight
+        self.virtual_time = 0.0
+        self.finish = {}
+
+    def finish_time(self, entry, now):
+        '''Returns the virtual finish time of entry, the sort key.'''
+        priority = entry.frame.frame_priority
+        weight = self.weights.get(priority, self.default_weight)
+        start = max(self.virtual_time, self.finish.get(priority, 0.0))
+        self.finish[priority] = start + entry.num_bits / weight
+        return self.finish[priority]
+
+    def pop(self, now):
+        if not self.entries:
+            return None
+        finish, _, entry = heapq.heappop(self.entries)
+        self.virtual_time = finish
+        return entry
+
+
+class DeadlineQueue(_HeapQueue):
+    '''Earliest deadline first. Every frame must be sent within the deadline
+        of its priority after it was generated.
+
+        Parameters
+        ----------
+        deadlines : dict
+            frame_priority -> deadline in seconds. Priorities not in
+            deadlines get default_deadline.
+        default_deadline : float
+            The default is 1 s.
+        drop_expired : bool
+            Whether frames past their deadline are dropped instead of sent.
+            The default is False.
+        '''
+    def __init__(self, deadlines=None, default_deadline=1.0, drop_expired=False):
+        super().__init__(self.deadline)
+        self.deadlines = deadlines if deadlines is not None else {}
+        self.default_deadline = default_deadline
+        self.drop_expired = drop_expired
+
+    def deadline(self, entry, now):
+        '''Returns the time entry must be sent by, the sort key.'''
+        return entry.generated + self.deadlines.get(entry.frame.frame_priority, self.default_deadline)
+
+    def _drop(self, now):
+        '''Drop the frames at the head of the queue which are past due.'''
+        while self.drop_expired and self.entries and self.entries[0][0] < now:
+            heapq.heappop(self.entries)
+            self.dropped += 1
+
+    def peek(self, now):
+        self._drop(now)
+        return super().peek(now)
+
+    def pop(self, now):
+        self._drop(now)
+        return super().pop(now)
+
+
+# name -> transmit queue class
+SCHEDULERS = {
+    'fifo': FIFOQueue,
+    'strict': StrictPriorityQueue,
+    'wfq': WeightedFairQueue,
+    'deadline': DeadlineQueue,
+}
+
+
+def make_queue(scheduler='fifo', **kwargs):
+    '''Create a transmit queue.
+        scheduler : str
+            'fifo', 'strict', 'wfq' or 'deadline'.
+        kwargs
+            Passed to the queue class, e.g. weights or deadlines.
+
+        Returns
+        -------
+        queue'''
+    if scheduler not in SCHEDULERS:
+        raise ValueError("unknown scheduler '%s', expected one of %s" % (scheduler, list(SCHEDULERS)))
+    return SCHEDULERS[scheduler](**kwargs)
+
+
+class AdmissionControl:
+    '''Admission control of frames on a ground station.
+
+        A frame may start when the number of transmissions already on the
+        air to its ground station is below the number of concurrent CDMA
+        users the link carries at target_ber. Frames below control_priority
+        must additionally leave reserved users free for control frames. A
+        frame is always admitted on an idle channel. Frames which are not
+        admitted back off and retry.
+
+        Parameters
+        ----------
+        target_ber : float
+            The highest acceptable BER. The default is 1e-4.
+        control_priority : int
+            Frames with at least this frame_priority may use the reserved
+            users. The default is CONTROL_PRIORITY.
+        reserved : int
+            Number of users kept free for control frames. The default is 1.
+        backoff : float
+            Mean backoff in seconds before a refused frame retries. The
+            default is .01.
+        '''
+    def __init__(self, target_ber=1e-4, control_priority=CONTROL_PRIORITY, reserved=1, backoff=.01):
+        self.target_ber = target_ber
+        self.control_priority = control_priority
+        self.reserved = reserved
+        self.backoff = backoff
+        self.refused = 0
+
+    def capacity(self, ber_row):
+        '''Returns the number of concurrent users a link carries at the
+            target BER.
+            ber_row : ndarray
+                BER by number of users as returned by BERTable.ber_row().'''
+        ok = np.flatnonzero(ber_row[1:] <= self.target_ber)
+        # BER grows with the number of users, so the last good entry counts
+        return int(ok[-1]) + 1 if len(ok) else 0
+
+    def admit(self, priority, active, capacity):
+        '''Returns whether a frame may start.
+            priority : int
+                frame_priority of the frame.
+            active : int
+                Number of transmissions already on the air.
+            capacity : int
+                Capacity of the link from capacity().'''
+        limit = capacity if priority >= self.control_priority else capacity - self.reserved
+        # an idle channel is always admitted so a weak link is not starved
+        if active == 0 or active < limit:
+            return True
+        self.refused += 1
+        return False
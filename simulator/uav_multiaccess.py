@@ -0,0 +1,168 @@
+###############################################################################
+# File: uav_multiaccess.py
+# Author: agent
+# Date: 10/19/2026
+# Revision: 1.0
+# Description: This file contains the asynchronous multiple access channel of
+#              the UAV protocol. Every user transmits a burst of its own length
+#              at an arbitrary sample offset, optionally repeated with a fixed
+#              period, so UAVPackets and longer TextPackets share the channel
+#              without being chip aligned. The receive buffer is built with
+#              blockwise overlap-add: only the blocks a burst occupies are
+#              touched, so the cost scales with the occupied samples rather
+#              than with the number of users times the buffer length.
+###############################################################################
+
+import numpy as np
+
+
+class Burst:
+    '''A waveform transmitted at offset and repeated every period samples.
+
+        Parameters
+        ----------
+        waveform : ndarray
+            The modulated waveform of the user, copied and scaled by gain.
+        offset : int
+            Sample of the receive buffer the first repetition starts at. It may
+            be negative for a burst which started before the buffer.
+        period : int
+            Number of samples between the starts of the repetitions. The
+            default is None, a single repetition.
+        repeats : int
+            Number of repetitions. The default is 1.
+        gain : float
+            Amplitude gain of the user, e.g. from uav_channel.PathLoss. The
+            default is 1.
+        '''
+    def __init__(self, waveform, offset=0, period=None, repeats=1, gain=1.0):
+        if repeats > 1 and period is None:
+            raise ValueError("a burst with %d repeats needs a period" % repeats)
+        self.waveform = gain * np.asarray(waveform, dtype=float)
+        self.offset = int(offset)
+        self.period = period
+        self.repeats = repeats
+        # received power of the user, the reference of uav_channel.AWGN
+        self.power = np.mean(self.waveform**2)
+
+    def starts(self):
+        '''Returns the first sample of every repetition.'''
+        if self.repeats == 1:
+            return np.array([self.offset])
+        return self.offset + self.period * np.arange(self.repeats)
+
+
+class MultiAccessChannel:
+    '''Asynchronous superposition of bursts in a receive buffer.
+
+        Parameters
+        ----------
+        num_samples : int
+            Length of the receive buffer.
+        block_length : int
+            Number of samples in an overlap-add block. The bursts covering a
+            block are added while it is in cache. The default is 4096.
+
+        Attributes(other than parameters)
+        ----------
+        bursts : list
+            The Burst of every user, in the order they were added.
+        '''
+    def __init__(self, num_samples, block_length=4096):
+        self.num_samples = num_samples
+        self.block_length = block_length
+        self.bursts = []
+
+    def add(self, waveform, offset=0, period=None, repeats=1, gain=1.0):
+        '''Add a user to the channel, see Burst. repeats=None repeats the
+            burst until the end of the buffer.
+
+            Returns
+            -------
+            index : int
+                The index of the user.'''
+        if repeats is None:
+            if period is None:
+                raise ValueError("a burst repeated until the end of the buffer needs a period")
+            repeats = max(1, -(-(self.num_samples - offset) // period))
+        self.bursts.append(Burst(waveform, offset, period, repeats, gain))
+        return len(self.bursts) - 1
+
+    def clear(self):
+        '''Remove every user, e.g. before the next trial.'''
+        self.bursts = []
+
+    def _pieces(self, start, stop):
+        '''Returns the pieces of the bursts overlapping samples start to stop,
+            split at the block boundaries and sorted by block, as (block,
+            first sample, last sample + 1, burst, first sample of the burst)
+            tuples.'''
+        B = self.block_length
+        start, stop = max(start, 0), min(stop, self.num_samples)
+        pieces = []
+        for i, burst in enumerate(self.bursts):
+            n = len(burst.waveform)
+            for s in burst.starts():
+                a, b = max(s, start), min(s + n, stop)
+                if a >= b:
+                    continue
+                for block in range(a // B, (b - 1) // B + 1):
+                    pa, pb = max(a, block * B), min(b, (block + 1) * B)
+                    pieces.append((block, pa, pb, i, pa - s))
+        pieces.sort(key=lambda piece: piece[0])
+        return pieces
+
+    def occupied_samples(self, start=0, stop=None):
+        '''Returns the number of burst samples overlapping samples start to
+            stop, the work done by render().'''
+        stop = self.num_samples if stop is None else stop
+        return sum(pb - pa for _, pa, pb, _, _ in self._pieces(start, stop))
+
+    def render(self, start=0, stop=None, noise=None, out=None):
+        '''Overlap-add the bursts into the receive buffer.
+            start : int
+                First sample to render. The default is 0.
+            stop : int
+                Last sample to render + 1. The default is the buffer length.
+            noise : AWGN
+                Optional uav_channel.AWGN stage added to the rendered samples.
+                Its reference_user is the index of a user, or None for the
+                power of the rendered samples. The default is None.
+            out : ndarray
+                Optional array of stop - start samples the result is written
+                to. The default is a new array.
+
+            Returns
+            -------
+            y : ndarray
+                The received samples, zero outside the buffer.'''
+        stop = self.num_samples if stop is None else stop
+        if out is None:
+            out = np.zeros(stop - start)
+        else:
+            out[:] = 0
+        for _, pa, pb, i, src in self._pieces(start, stop):
+            out[pa - start:pb - start] += self.bursts[i].waveform[src:src + pb - pa]
+        if noise is not None:
+            user_power = np.array([[burst.power for burst in self.bursts]])
+            total_power = np.array([np.mean(out**2)])
+            out[:] = noise.apply(out[np.newaxis, :], None, user_power, total_power)[0]
+        return out
+
+    def receive(self, index, repeat=0, noise=None, out=None):
+        '''Render the samples of one repetition of a user, e.g. to demodulate
+            it with UAVSignal.demodulate().
+            index : int
+                The index of the user.
+            repeat : int
+                The repetition. The default is 0.
+            noise, out
+                See render().
+
+            Returns
+            -------
+            y : ndarray
+                The received samples aligned with the burst.'''
+        burst = self.bursts[index]
+        start = burst.starts()[repeat]
+        return self.render(start, start + len(burst.waveform), noise, out)
@@ -0,0 +1,477 @@
+###############################################################################
+# File: uav_network.py
+# Author: agent
+# Date: 10/19/2026
+# Revision: 1.0
+# Description: This file contains a discrete-event network simulator for the
+#              UAV protocol. UAV nodes generate UAVFrame transmissions to
+#              ground stations over time, a heap of timestamped events moves
+#              the frames between nodes and the physical layer decides which
+#              frames are delivered through a cached BER lookup indexed by
+#              SNR and the number of concurrent CDMA users. Each node sends
+#              its frames through a transmit queue and optional admission
+#              control from uav_mac. The simulator reports throughput,
+#              latency percentiles and loss, overall and by frame_priority.
+###############################################################################
+
+import heapq
+
+import numpy as np
+from prettytable import PrettyTable
+from scipy.special import erfc
+
+import uav_frame as uavfr
+import uav_mac as uavm
+import uav_packet as uavp
+import uav_signal as uavs
+
+# event kinds
+GENERATE = 0
+TX_END = 1
+RETRY = 2
+
+
+class BERTable:
+    '''Cached bit error rate lookup for the physical layer.
+
+        Parameters
+        ----------
+        snrs : ndarray
+            The SNRs in dB of the table rows.
+        bers : ndarray
+            A (snrs x users) array, bers[i, k-1] is the BER at snrs[i] with
+            k concurrent users on the channel.
+        '''
+    def __init__(self, snrs, bers):
+        self.snrs = np.asarray(snrs, dtype=float)
+        self.bers = np.atleast_2d(np.asarray(bers, dtype=float))
+        self.max_users = self.bers.shape[1]
+
+    @classmethod
+    def gaussian(cls, pn_width, snrs, max_users):
+        '''Build the table from the Gaussian approximation of chip aligned
+            DS-CDMA with random PN codes. Each interferer adds 1/pn_width to
+            the inverse SINR at the correlator output.
+            pn_width : int
+                Number of chips per bit.
+            snrs : ndarray
+                SNRs in dB as used by UAVSignal.modulate().
+            max_users : int
+                Largest number of concurrent users in the table.
+
+            Returns
+            -------
+            table : BERTable'''
+        snrs = np.asarray(snrs, dtype=float)
+        users = np.arange(1, max_users + 1)
+        noise = 1 / (pn_width * uavs.REFERENCE_SAMPLES_PER_CHIP * 10**(snrs[:, np.newaxis] / 10))
+        interference = (users[np.newaxis, :] - 1) / pn_width
+        sinr = 1 / (noise + interference)
+        return cls(snrs, 0.5 * erfc(np.sqrt(sinr / 2)))
+
+    @classmethod
+    def from_simulation(cls, pn_width, snrs, max_users, trials=10, Fs=900e6, fc=100, bit_t=.01,
+                        samples_per_chip=10):
+        '''Build the table by running UAVSignal with random packets and codes.
+            This is slow, save the result with save() and reuse it.
+            pn_width : int
+                Number of chips per bit.
+            snrs : ndarray
+                SNRs in dB.
+            max_users : int
+                Largest number of concurrent users in the table.
+            trials : int
+                Number of packets per table entry. The default is 10.
+            samples_per_chip : int
+                Samples per chip of the simulation, 2 with fc=0 is the
+                fastest. The default is 10.
+
+            Returns
+            -------
+            table : BERTable'''
+        def random_signal():
+            packet = uavp.UAVPacket(*np.random.randint(-128, 128, 12))
+            message = packet.get_message()
+            return message.copy(), uavs.UAVSignal(message, np.random.randint(0, 2, pn_width), Fs, fc, pn_width, bit_t,
+                                                   samples_per_chip)
+
+        bers = np.zeros((len(snrs), max_users))
+        for k in range(1, max_users + 1):
+            for trial in range(trials):
+                message, victim = random_signal()
+                interferers = [random_signal()[1].modulate() for _ in range(k - 1)]
+                addsignal = np.sum(interferers, axis=0) if interferers else None
+                for i, snr in enumerate(snrs):
+                    victim.modulate(SNR=snr, addsignal=addsignal)
+                    errors = np.sum((victim.demodulate() > 0) != (message > 0))
+                    bers[i, k - 1] += errors / (len(message) * trials)
+        return cls(snrs, bers)
+
+    def save(self, path):
+        '''Save the table to a .npz file.'''
+        np.savez(path, snrs=self.snrs, bers=self.bers)
+
+    @classmethod
+    def load(cls, path):
+        '''Load a table saved with save().'''
+        data = np.load(path)
+        return cls(data['snrs'], data['bers'])
+
+    def ber_row(self, snr):
+        '''Returns the BER for 0 to max_users concurrent users at snr,
+            interpolated in log BER between the table rows. Index 0 is the
+            same as 1 user.'''
+        logs = np.log10(np.maximum(self.bers, 1e-300))
+        row = np.array([np.interp(snr, self.snrs, logs[:, k]) for k in range(self.max_users)])
+        return np.concatenate(([10**row[0]], 10**row))
+
+    def ber(self, snr, users):
+        '''Returns the BER at snr with the given number of concurrent users.'''
+        return self.ber_row(snr)[min(users, self.max_users)]
+
+
+class GroundStation:
+    '''A ground station receiving frames.
+
+        Parameters
+        ----------
+        address : int
+            Address of the station, used as frame_destination.
+
+        Attributes(other than parameters)
+        ----------
+        active : set
+            The transmissions currently on the air to this station.
+        received : int
+            Number of frames delivered to this station.
+        '''
+    def __init__(self, address):
+        self.address = address
+        self.active = set()
+        self.received = 0
+
+
+class Flow:
+    '''A stream of frames generated by a UAV node.
+
+        Parameters
+        ----------
+        node : UAVNode
+            The node sending the frames.
+        frame : UAVFrame
+            The frame sent for every generated frame of the flow.
+        interval : float
+            Mean time between generated frames in seconds.
+        poisson : bool
+            Whether frames are generated as a Poisson process or
+            periodically.
+        '''
+    def __init__(self, node, frame, interval, poisson):
+        self.node = node
+        self.frame = frame
+        self.num_bits = len(frame.create_message())
+        self.interval = interval
+        self.poisson = poisson
+
+
+class UAVNode:
+    '''A UAV sending frames to a ground station.
+
+        Parameters
+        ----------
+        address : int
+            Address of the node, the frame_source of its frames.
+        destination : int
+            Address of the ground station the node sends to.
+        snr : float
+            SNR in dB of the link to the ground station.
+        queue : transmit queue
+            A queue from uav_mac deciding which waiting frame is sent next.
+            The default is a uav_mac.FIFOQueue.
+
+        Attributes(other than parameters)
+        ----------
+        flows : list
+            The Flow objects of the node.
+        busy : bool
+            Whether the node is transmitting or waiting for admission.
+        '''
+    def __init__(self, address, destination, snr, queue=None):
+        self.address = address
+        self.destination = destination
+        self.snr = snr
+        self.queue = queue if queue is not None else uavm.FIFOQueue()
+        self.flows = []
+        self.busy = False
+        self.ber_row = None
+        self.capacity = None
+
+
+class Transmission:
+    '''A frame on the air.'''
+    __slots__ = ('node', 'entry', 'users')
+
+    def __init__(self, node, entry, users):
+        self.node = node
+        self.entry = entry
+        self.users = users
+
+
+class NetworkSimulator:
+    '''Heap based discrete-event simulator of UAVs sending frames to ground
+        stations over a shared CDMA channel.
+
+        A frame is delivered with probability (1 - BER)**bits where the BER
+        is looked up for the link SNR and the largest number of concurrent
+        transmissions to the same ground station during the frame.
+
+        Parameters
+        ----------
+        ber_table : BERTable
+            The physical layer BER lookup.
+        bit_rate : float
+            Bit rate of every link in bits per second. The default is 100,
+            one bit per bit_t = .01 s of UAVSignal.
+        seed : int
+            Seed of the random generator. The default is None.
+        admission : uav_mac.AdmissionControl
+            Optional admission control of frames on the ground stations.
+            The default is None, every frame is admitted.
+        '''
+    def __init__(self, ber_table, bit_rate=100, seed=None, admission=None):
+        self.ber_table = ber_table
+        self.bit_rate = bit_rate
+        self.rng = np.random.default_rng(seed)
+        self.admission = admission
+        self.nodes = []
+        self.stations = {}
+        self.events = []
+        self.sequence = 0
+        self.now = 0.0
+        self.stats = None
+
+    def add_ground_station(self, address):
+        '''Add a ground station to the network.'''
+        station = GroundStation(address)
+        self.stations[address] = station
+        return station
+
+    def add_uav(self, frame, interval, snr, poisson=True, queue=None):
+        '''Add a UAV sending frame to the ground station at frame_destination.
+            frame : UAVFrame or UAVPacket
+                The frame to send. A packet is framed with the default
+                addressing of UAVFrame.
+            interval : float
+                Mean time between frames in seconds.
+            snr : float
+                SNR in dB of the link.
+            queue : transmit queue
+                Optional queue from uav_mac.make_queue(). The default is
+                first in first out.
+
+            Returns
+            -------
+            node : UAVNode'''
+        if not isinstance(frame, uavfr.UAVFrame):
+            frame = uavfr.UAVFrame(frame)
+        if frame.frame_destination not in self.stations:
+            raise ValueError("no ground station with address %d" % frame.frame_destination)
+        node = UAVNode(frame.frame_source, frame.frame_destination, snr, queue)
+        node.ber_row = self.ber_table.ber_row(snr)
+        if self.admission is not None:
+            node.capacity = self.admission.capacity(node.ber_row)
+        self.nodes.append(node)
+        self.add_flow(node, frame, interval, poisson)
+        return node
+
+    def add_flow(self, node, frame, interval, poisson=True):
+        '''Add another stream of frames to a node, e.g. bulk TextPacket
+            frames next to flight-control frames.
+            node : UAVNode
+                The node returned by add_uav().
+            frame : UAVFrame or UAVPacket
+                The frame to send. Its frame_priority is used by the queue of
+                the node.
+            interval : float
+                Mean time between frames in seconds.
+
+            Returns
+            -------
+            flow : Flow'''
+        if not isinstance(frame, uavfr.UAVFrame):
+            frame = uavfr.UAVFrame(frame, frame_source=node.address, frame_destination=node.destination)
+        flow = Flow(node, frame, interval, poisson)
+        node.flows.append(flow)
+        return flow
+
+    def schedule(self, time, kind, data):
+        '''Push an event on the heap.'''
+        heapq.heappush(self.events, (time, self.sequence, kind, data))
+        self.sequence += 1
+
+    def next_interval(self, flow):
+        '''Returns the time until the next frame of flow is generated.'''
+        if flow.poisson:
+            return self.rng.exponential(flow.interval)
+        return flow.interval
+
+    def send_next(self, node):
+        '''Put the next frame of node on the air if it is admitted.'''
+        entry = node.queue.peek(self.now)
+        if entry is None:
+            node.busy = False
+            return
+        station = self.stations[node.destination]
+        node.busy = True
+        if self.admission is not None and \
+                not self.admission.admit(entry.frame.frame_priority, len(station.active), node.capacity):
+            self.schedule(self.now + self.rng.exponential(self.admission.backoff), RETRY, node)
+            return
+        node.queue.pop(self.now)
+        tx = Transmission(node, entry, 0)
+        station.active.add(tx)
+        users = len(station.active)
+        for other in station.active:
+            if other.users < users:
+                other.users = users
+        self.schedule(self.now + entry.num_bits / self.bit_rate, TX_END, tx)
+
+    def run(self, until, warmup=0.0):
+        '''Run the simulation.
+            until : float
+                Simulated time in seconds to stop at.
+            warmup : float
+                Frames generated before warmup are not counted in the
+                statistics. The default is 0.
+
+            Returns
+            -------
+            stats : NetworkStats'''
+        stats = NetworkStats(until - warmup)
+        for node in self.nodes:
+            for flow in node.flows:
+                # random phase so periodic flows do not all start together
+                self.schedule(self.rng.uniform(0, flow.interval), GENERATE, flow)
+
+        events = self.events
+        rng = self.rng
+        num_events = 0
+        while events and events[0][0] <= until:
+            self.now, _, kind, data = heapq.heappop(events)
+            num_events += 1
+            if kind == GENERATE:
+                flow = data
+                node = flow.node
+                node.queue.push(uavm.QueuedFrame(flow.frame, flow.num_bits, self.now), self.now)
+                if not node.busy:
+                    self.send_next(node)
+                self.schedule(self.now + self.next_interval(flow), GENERATE, flow)
+            elif kind == TX_END:
+                tx = data
+                node = tx.node
+                entry = tx.entry
+                station = self.stations[node.destination]
+                station.active.discard(tx)
+                ber = node.ber_row[min(tx.users, self.ber_table.max_users)]
+                if entry.generated >= warmup:
+                    if rng.random() < (1 - ber)**entry.num_bits:
+                        station.received += 1
+                        stats.delivered(entry, self.now - entry.generated)
+                    else:
+                        stats.lost(entry)
+                self.send_next(node)
+            elif kind == RETRY:
+                self.send_next(data)
+        stats.num_events = num_events
+        stats.unsent = sum(len(node.queue) for node in self.nodes)
+        stats.dropped = sum(node.queue.dropped for node in self.nodes)
+        self.stats = stats
+        return stats
+
+
+class NetworkStats:
+    '''Statistics collected by NetworkSimulator.run().
+
+        Parameters
+        ----------
+        duration : float
+            Measured simulated time in seconds.
+
+        Attributes(other than parameters)
+        ----------
+        num_delivered : int
+            Number of frames delivered.
+        num_lost : int
+            Number of frames lost to bit errors.
+        delivered_bits : int
+            Number of frame bits delivered.
+        latencies : list
+            Time from generation to delivery of every delivered frame.
+        priority_latencies : dict
+            frame_priority -> latencies of the delivered frames.
+        num_events : int
+            Number of events processed.
+        unsent : int
+            Number of frames still queued at the end of the run.
+        dropped : int
+            Number of frames dropped by the transmit queues.
+        '''
+    def __init__(self, duration):
+        self.duration = duration
+        self.num_delivered = 0
+        self.num_lost = 0
+        self.delivered_bits = 0
+        self.latencies = []
+        self.priority_latencies = {}
+        self.num_events = 0
+        self.unsent = 0
+        self.dropped = 0
+
+    def delivered(self, entry, latency):
+        '''Record a delivered frame.'''
+        self.num_delivered += 1
+        self.delivered_bits += entry.num_bits
+        self.latencies.append(latency)
+        self.priority_latencies.setdefault(entry.frame.frame_priority, []).append(latency)
+
+    def lost(self, entry):
+        '''Record a lost frame.'''
+        self.num_lost += 1
+
+    def throughput(self):
+        '''Returns the delivered bits per second.'''
+        return self.delivered_bits / self.duration
+
+    def loss(self):
+        '''Returns the fraction of sent frames which were lost.'''
+        sent = self.num_delivered + self.num_lost
+        return self.num_lost / sent if sent else 0.0
+
+    def latency_percentiles(self, percentiles=(50, 90, 99), priority=None):
+        '''Returns the latency at the given percentiles in seconds, of all
+            frames or of the frames with the given frame_priority.'''
+        latencies = self.latencies if priority is None else self.priority_latencies.get(priority, [])
+        if not latencies:
+            return np.full(len(percentiles), np.nan)
+        return np.percentile(latencies, percentiles)
+
+    def print_stats(self):
+        '''Print the statistics in a table format.'''
+        p50, p90, p99 = self.latency_percentiles()
+        table = PrettyTable()
+        table.field_names = ["", "Value"]
+        table.add_row(["Frames delivered", self.num_delivered])
+        table.add_row(["Frames lost", self.num_lost])
+        table.add_row(["Frames dropped", self.dropped])
+        table.add_row(["Frames still queued", self.unsent])
+        table.add_row(["Loss", "%.4f" % self.loss()])
+        table.add_row(["Throughput (bit/s)", "%.1f" % self.throughput()])
+        table.add_row(["Latency p50 (s)", "%.3f" % p50])
+        table.add_row(["Latency p90 (s)", "%.3f" % p90])
+        table.add_row(["Latency p99 (s)", "%.3f" % p99])
+        if len(self.priority_latencies) > 1:
+            for priority in sorted(self.priority_latencies, reverse=True):
+                p50, p90, p99 = self.latency_percentiles(priority=priority)
+                table.add_row(["Priority %d latency p50/p99 (s)" % priority, "%.3f / %.3f" % (p50, p99)])
+        table.add_row(["Events", self.num_events])
+        print(table)
@@ -38,6 +38,10 @@ class UAVPacket:
     -------
     get_message()
         Convert the packet to a binary message.
+    get_bytes()
+        Convert the packet to a byte array.
+    from_bytes()
+        Create a packet from a byte array.
     get_pn_code()
         Generate a pseudo-random binary sequence (PN code) of length 12 bytes using 
         the ID of the UAV and the ID of the control station.
@@ -83,6 +87,24 @@ class UAVPacket:
         message = UAV_ID + CONTROL_ID + UAV_RECIEVER_STATUS + UAV_TRANSMITTER_STATUS + CONTROL_RECIEVER_STATUS + CONTROL_TRANSMITTER_STATUS + CHANGE_X + CHANGE_Y + CHANGE_Z + CHANGE_PITCH + CHANGE_ROLL + CHANGE_YAW
         MESSAGE = [int(x) for x in message]
         return np.array(MESSAGE)
+
+    def get_bytes(self):
+        '''Convert the packet to bytes.
+        return: a uint8 array of length 12 (longer for a TextPacket).'''
+        fields = [self.UAV_ID, self.CONTROL_ID, self.UAV_RECIEVER_STATUS, self.UAV_TRANSMITTER_STATUS,
+                  self.CONTROL_RECIEVER_STATUS, self.CONTROL_TRANSMITTER_STATUS, self.CHANGE_X,
+                  self.CHANGE_Y, self.CHANGE_Z, self.CHANGE_PITCH, self.CHANGE_ROLL, self.CHANGE_YAW]
+        # the same two's complement bytes as get_message() without the bit strings
+        return np.array(fields, dtype=np.int64).astype(np.uint8)
+
+    @classmethod
+    def from_bytes(cls, data):
+        '''Create a packet from its byte representation.
+        Parameters:
+            data: the 12 packet bytes as produced by get_bytes().
+        return: a new packet with the fields decoded as signed 8 bit values.'''
+        fields = np.asarray(data, dtype=np.uint8)[:12].astype(np.int8)
+        return cls(*fields.tolist())
     
     def get_pn_code(self, mbits = 4):
         '''Create a m-bit pseudo-noise code using the UAV_ID and CONTROL_ID.
@@ -189,6 +211,19 @@ class TextPacket(UAVPacket):
 
         return message
 
+    def get_bytes(self):
+        '''Convert the packet and the text to bytes.'''
+        text = np.frombuffer(self.TEXT.encode('latin-1'), dtype=np.uint8)
+        return np.concatenate((super().get_bytes(), text))
+
+    @classmethod
+    def from_bytes(cls, data):
+        '''Create a text packet from its byte representation.'''
+        data = np.asarray(data, dtype=np.uint8)
+        packet = super().from_bytes(data)
+        packet.TEXT = data[12:].tobytes().decode('latin-1')
+        return packet
+
     def print_tx_frame(self):
         '''Print the message to be sent.'''
         super().print_tx_frame()
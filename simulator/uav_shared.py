@@ -0,0 +1,215 @@
+###############################################################################
+# File: uav_shared.py
+# Author: agent
+# Date: 10/19/2026
+# Revision: 1.0
+# Description: This file contains the shared-memory multi-user channel used
+#              for multi-process CDMA capacity sweeps. The modulated waveforms,
+#              tiled PN codes and messages of every user are placed once in
+#              multiprocessing.shared_memory blocks. Worker processes attach
+#              to them as read-only NumPy views when they start, so a work
+#              item only carries a few integers and the RAM used does not grow
+#              with the number of workers.
+###############################################################################
+
+import concurrent.futures
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# arrays kept in shared memory
+ARRAY_NAMES = ('waveforms', 'codes', 'messages')
+
+# the SharedWaveforms a worker process attached to in _init_worker()
+_worker_shared = None
+
+
+def _attach_block(name):
+    '''Attach to an existing shared memory block without handing it to the
+        resource tracker, which would unlink it when the worker exits.'''
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # python < 3.13 always registers the block. Unregistering afterwards
+        # would also drop the owner's entry when the tracker is shared with
+        # a forked parent, so skip the registration instead.
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedWaveforms:
+    '''Waveforms, tiled PN codes and messages of many users in shared memory.
+
+        The process creating the object owns the blocks and unlinks them in
+        unlink() or when used as a context manager. Other processes use
+        attach() with the descriptor and only close() their views.
+
+        Parameters
+        ----------
+        waveforms : ndarray
+            (users x samples) modulated waveforms.
+        codes : ndarray
+            (users x samples) despreading sequences, the PN code of every
+            user tiled over the message with each chip times the carrier.
+        messages : ndarray
+            (users x bits) messages of 0s and 1s.
+
+        Attributes(other than parameters)
+        ----------
+        descriptor : dict
+            Picklable description of the blocks for attach().
+        '''
+    def __init__(self, waveforms, codes, messages):
+        self.owner = True
+        self.blocks = {}
+        self.descriptor = {}
+        arrays = {'waveforms': waveforms, 'codes': codes, 'messages': messages}
+        try:
+            for name in ARRAY_NAMES:
+                array = np.ascontiguousarray(arrays[name])
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                self.blocks[name] = block
+                view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+                view[...] = array
+                view.flags.writeable = False
+                setattr(self, name, view)
+                self.descriptor[name] = (block.name, array.shape, array.dtype.str)
+        except BaseException:
+            self.unlink()
+            raise
+
+    @classmethod
+    def from_signals(cls, signals):
+        '''Modulate UAVSignal objects and place them in shared memory.
+            signals : list
+                UAVSignal objects of equal length.
+
+            Returns
+            -------
+            shared : SharedWaveforms'''
+        waveforms = np.stack([s.modulate() for s in signals])
+        codes = np.stack([np.repeat(s.pn_code, len(s.t)) * np.tile(s.s1, len(s.pn_code)) for s in signals])
+        messages = np.stack([np.asarray(s.original_message) > 0 for s in signals]).astype(np.int8)
+        return cls(waveforms, codes, messages)
+
+    @classmethod
+    def attach(cls, descriptor):
+        '''Attach to the blocks of another process as read-only views.
+            descriptor : dict
+                The descriptor of the owning SharedWaveforms.
+
+            Returns
+            -------
+            shared : SharedWaveforms'''
+        shared = cls.__new__(cls)
+        shared.owner = False
+        shared.blocks = {}
+        shared.descriptor = descriptor
+        for name in ARRAY_NAMES:
+            block_name, shape, dtype = descriptor[name]
+            block = _attach_block(block_name)
+            shared.blocks[name] = block
+            view = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+            view.flags.writeable = False
+            setattr(shared, name, view)
+        return shared
+
+    @property
+    def num_users(self):
+        return self.waveforms.shape[0]
+
+    def close(self):
+        '''Release the views of this process.'''
+        for name in ARRAY_NAMES:
+            if hasattr(self, name):
+                delattr(self, name)
+        for block in self.blocks.values():
+            block.close()
+
+    def unlink(self):
+        '''Close and free the blocks. Only the owner frees them.'''
+        blocks = dict(self.blocks)
+        self.close()
+        if self.owner:
+            for block in blocks.values():
+                block.unlink()
+        self.blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.unlink()
+
+
+def bit_errors(shared, victim, count, trial, seed=0):
+    '''Count the bit errors of the victim with count random interferers.
+        shared : SharedWaveforms
+            The users.
+        victim : int
+            Index of the user under test.
+        count : int
+            Number of interfering users added to the victim.
+        trial : int
+            Trial number, with seed it selects the interferers so the
+            result does not depend on which process runs it.
+
+        Returns
+        -------
+        errors : int'''
+    rng = np.random.default_rng([seed, victim, count, trial])
+    others = np.delete(np.arange(shared.num_users), victim)
+    interferers = rng.choice(others, size=count, replace=False)
+    rx = shared.waveforms[victim] + shared.waveforms[interferers].sum(axis=0)
+    num_bits = shared.messages.shape[1]
+    soft = (rx * shared.codes[victim]).reshape(num_bits, -1).sum(axis=1)
+    return int(np.sum((soft > 0) != shared.messages[victim]))
+
+
+def _init_worker(descriptor):
+    '''Attach a worker process to the shared waveforms once.'''
+    global _worker_shared
+    _worker_shared = SharedWaveforms.attach(descriptor)
+
+
+def _worker_bit_errors(victim, count, trial, seed):
+    return bit_errors(_worker_shared, victim, count, trial, seed)
+
+
+def capacity_sweep(shared, counts, trials, victim=0, workers=None, seed=0):
+    '''BER of the victim against the number of interferers, with the
+        (interferer count, trial) work items spread over processes.
+        shared : SharedWaveforms
+            The users, created by this process.
+        counts : list
+            Numbers of interferers to test.
+        trials : int
+            Trials per interferer count.
+        victim : int
+            Index of the user under test. The default is 0.
+        workers : int
+            Number of worker processes, 0 runs in this process. The default
+            is the number of CPUs.
+        seed : int
+            Seed selecting the interferers of every trial. The default is 0.
+
+        Returns
+        -------
+        BERs : ndarray
+            The BER for every count.'''
+    items = [(victim, count, trial, seed) for count in counts for trial in range(trials)]
+    if workers == 0:
+        errors = [bit_errors(shared, *item) for item in items]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker,
+                                                    initargs=(shared.descriptor,)) as pool:
+            chunksize = max(1, len(items) // (4 * (workers or os.cpu_count())))
+            errors = list(pool.map(_worker_bit_errors, *zip(*items), chunksize=chunksize))
+    errors = np.array(errors).reshape(len(counts), trials)
+    return errors.sum(axis=1) / (trials * shared.messages.shape[1])
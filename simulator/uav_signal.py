@@ -2,7 +2,7 @@
 # File: uav_signal.py
 # Author: Daniel Nybo
 # Date: 4/14/2022
-# Revision: 2.0
+# Revision: 3.0
 # Description: This file contains the UAVSignal class. The purpose of this class
 # is to encode and modulate a BPSK Binary Phase-shift Keying signal given a
 # message and a PN code for DSSS encoding. The class also demodulates the 
@@ -14,8 +14,33 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
+from fractions import Fraction
 from scipy import signal
 
+# samples per chip the SNR of UAVSignal.modulate() is measured at
+REFERENCE_SAMPLES_PER_CHIP = 10
+
+
+def resample(samples, from_rate, to_rate, axis=-1):
+    '''Resamples a waveform with a polyphase filter.
+        samples : ndarray
+            The waveform, or a batch of waveforms along axis.
+        from_rate : float
+            The sample rate of samples in Hz.
+        to_rate : float
+            The wanted sample rate in Hz.
+
+        Returns
+        -------
+        samples : ndarray
+            The waveform at to_rate.'''
+    # build the ratio from the rates themselves, approximating the quotient
+    # would change the rate when it needs a large denominator
+    ratio = Fraction(to_rate).limit_denominator() / Fraction(from_rate).limit_denominator()
+    if ratio == 1:
+        return np.asarray(samples)
+    return signal.resample_poly(samples, ratio.numerator, ratio.denominator, axis=axis)
+
 
 class UAVSignal:
     '''UAVSignal class encodes and modulates a BPSK Binary Phase-shift 
@@ -33,19 +58,34 @@ class UAVSignal:
             The PN pseudo-random code to be used for DSSS encoding. The PN code 
             is a list of 0s and 1s.
         Fs : float
-            The sampling frequency of the signal. The default is 2.4e9.
+            The sampling frequency of the captured signal, e.g. of an SDR. The default
+            is 2.4e9.
         fc : float
-            The carrier frequency of the signal.
+            The carrier frequency of the signal. 0 gives a baseband signal, which is
+            needed at low samples_per_chip. It must be below the Nyquist frequency
+            of the simulation.
         fp : int
             number of bits in the PN code for DSSS encoding.  
         bit_t : float
-            period for a symbol in the message. The default is .01.
-
+            period for a chip of the PN code. The default is .01.
+        samples_per_chip : int
+            Number of samples per chip of the simulated waveform. None derives it
+            from Fs and the chip rate 1/bit_t, which simulates at the capture rate.
+            Fewer samples per chip trade fidelity for speed. The default is 10.
+        rng : Generator
+            Optional numpy.random.Generator for the noise of modulate(), which is
+            then drawn in place. The default uses the global numpy random state.
 
         Attributes(other than parameters)
         ----------
+        chip_rate : float
+            The number of chips per second.
+        sample_rate : float
+            The sample rate of the simulated waveform, samples_per_chip * chip_rate.
         original_message : ndarray
             The original message before encoding and modulation.
+        SNR : float
+            The SNR of modulate() when it is called without one, see rearm().
         BPSK : ndarray
             The BPSK modulated signal.
         DSSS : ndarray
@@ -56,88 +96,178 @@ class UAVSignal:
             The demodulated signal.
         result : ndarray
             The decoded message.
+        soft : ndarray
+            The correlator output for each bit of the decoded message.
         '''
 
-    def __init__(self, message=[0, 1, 0, 1], pn_code=[1,0,0,1], Fs=2.4e9, fc=100, fp=4, bit_t=.01):
+    def __init__(self, message=[0, 1, 0, 1], pn_code=[1,0,0,1], Fs=2.4e9, fc=100, fp=4, bit_t=.01,
+                 samples_per_chip=10, rng=None):
         '''Initializes the UAVSignal class.'''
-        self.message = message
-        self.pn_code = self.set_pn_code(pn_code)
-        self.original_message = message
-        self.message[self.message == 0] = -1 # convert 0 to -1 for DSSS encoding
-        self.message = np.tile(self.message, (fp,1))  # scale and reshape the message for DSSS encoding
-        self.message = self.message.T.reshape(1, self.message.size)[0]
-        self.pn_code[self.pn_code == 0] = -1
         self.Fs = Fs
         self.fc = fc
         self.fp = fp
         self.bit_t = bit_t
-        self.t = np.arange(0, (bit_t-1/Fs), 1/1000)
-        self.s0 = -1*np.sin(2 * np.pi * fc * self.t)
-        self.s1 = np.sin(2 * np.pi * fc * self.t)
+        self.chip_rate = 1 / bit_t
+        if samples_per_chip is None:
+            samples_per_chip = int(round(Fs / self.chip_rate))
+        self.samples_per_chip = samples_per_chip
+        self.sample_rate = samples_per_chip * self.chip_rate
+        if fc >= self.sample_rate / 2:
+            raise ValueError("carrier of %g Hz is above the Nyquist frequency of %g samples per chip, "
+                             "use more samples per chip or fc=0" % (fc, samples_per_chip))
+        self.t = np.arange(samples_per_chip) / self.sample_rate
+        if fc == 0:
+            # baseband chips
+            self.s1 = np.ones(samples_per_chip)
+        else:
+            self.s1 = np.sin(2 * np.pi * fc * self.t)
+        self.s0 = -1*self.s1
+        self.rng = rng
+        self.SNR = None
+        self.num_bits = 0
+        self.message = np.array([])
+        self.pn_code = np.array([])
+        self.pn_code_wrong = np.array([])
         self.carrier = np.array([])
         self.BPSK = np.array([])
-        self.DSSS = self.message * self.pn_code
+        self.DSSS = np.array([])
         self.rx = np.array([])
         self.demod = np.array([])
         self.result = np.array([])
+        self.soft = np.array([])
         self.result_wrong = np.array([])
         self.rx2 = np.array([])
         self.demod2 = np.array([])
-        self.pn_code_wrong = np.random.randint(0, 2, size=len(self.pn_code))
-        self.pn_code_wrong[self.pn_code_wrong == 0] = -1
+        # output buffers of modulate() and demodulate(), reused between calls
+        self._buffers = {}
+        self.rearm(message, pn_code)
+
+    def rearm(self, message=None, pn_code=None, SNR=None):
+        '''Re-arms the signal with a new message, PN code or SNR. The buffers of
+            the signal are reused when the length of the message does not change,
+            so a signal can be modulated and demodulated in a trial loop without
+            allocating new arrays.
+            message : ndarray
+                The new message, a list of 0s and 1s. As in __init__, the 0s are
+                replaced by -1 in place. The default keeps the message.
+            pn_code : ndarray
+                The new PN code, a list of 0s and 1s. The default keeps the PN code.
+            SNR : float
+                The new SNR of modulate() when it is called without one. The default
+                keeps the SNR, set the SNR attribute to None for no noise.'''
+        if SNR is not None:
+            self.SNR = SNR
+        if message is None and pn_code is None:
+            return
+        if pn_code is not None:
+            self.code = np.array(pn_code)
+            self.fp = len(self.code)
+        if message is not None:
+            message = np.asarray(message)
+            message[message == 0] = -1 # convert 0 to -1 for DSSS encoding
+            self.original_message = message
+            self.num_bits = len(message)
+        # re-arming also returns the receiver to the code of the signal
+        self.set_pn_code(self.code)
+        num_chips = len(self.pn_code)
+        if len(self.message) != num_chips or self.message.dtype != self.original_message.dtype:
+            self.message = np.empty(num_chips, dtype=self.original_message.dtype)
+            self.DSSS = np.empty(num_chips)
+            self.carrier = np.tile(self.s1, num_chips)
+        if len(self.pn_code_wrong) != num_chips:
+            self.pn_code_wrong = np.random.randint(0, 2, size=num_chips)
+            self.pn_code_wrong[self.pn_code_wrong == 0] = -1
+            self._wrong_samples = np.repeat(self.pn_code_wrong, self.samples_per_chip)
+        # scale the message for DSSS encoding, every bit lasts one PN code
+        self.message.reshape(self.num_bits, -1)[:] = self.original_message[:, np.newaxis]
+        np.multiply(self.message, self.pn_code, out=self.DSSS)
 
     def set_pn_code(self, pn_code=None):
-        '''Sets the PN code for DSSS encoding.
+        '''Sets the PN code used to despread the signal, e.g. to demodulate another
+            user. Use rearm() to change the PN code the signal is encoded with.
             pn_code : ndarray
                 The PN pseudo-random code to be used for DSSS encoding. The PN code
-                is a list of 0s and 1s.
+                is a list of fp 0s and 1s.
             Returns
             -------
-            codearray : ndarray'''
-        codearray = np.array([])
-        for i in range(len(self.message)):
-            codearray = np.concatenate((codearray, pn_code))
-        self.pn_code = codearray
-        return codearray
-    
-    def modulate(self, SNR = None, addsignal = None, plot=False):
+            codearray : ndarray
+                The PN code as 1s and -1s, repeated for every bit of the message.'''
+        chips = np.where(np.asarray(pn_code) == 1, 1.0, -1.0)
+        if len(chips) != self.fp:
+            raise ValueError("PN code of %d chips does not match the %d chips per bit of the signal, "
+                             "use rearm() to change the code width" % (len(chips), self.fp))
+        num_chips = self.num_bits * len(chips)
+        if len(self.pn_code) != num_chips:
+            self.pn_code = np.empty(num_chips)
+            self._code_samples = np.empty(num_chips * self.samples_per_chip)
+        self.pn_code.reshape(self.num_bits, -1)[:] = chips
+        self._code_samples.reshape(num_chips, -1)[:] = self.pn_code[:, np.newaxis]
+        return self.pn_code
+
+    def _buffer(self, name, size):
+        '''Returns the buffer name of the given size, allocating it on first use
+            or when the size changed.'''
+        buffer = self._buffers.get(name)
+        if buffer is None or len(buffer) != size:
+            buffer = self._buffers[name] = np.empty(size)
+        return buffer
+
+    def modulate(self, SNR = None, addsignal = None, plot=False, channel=None, out=None):
         '''Modulates the DSSS encoded signal.
             SNR : float
                 Optional Parameter for adding noise to signal in simulation environment. 
-                The default is None.
+                The SNR is measured in the bandwidth of REFERENCE_SAMPLES_PER_CHIP samples
+                per chip so the BER does not depend on samples_per_chip. The default is
+                the SNR given to rearm(), None.
             addsignal : ndarray
                 Optional addition of another signal of the same width for simulating 
                 CDMA. The default is None.
             plot : bool
                 Optional parameter for plotting the modulated signal. The default is False.
+            channel : Channel
+                Optional uav_channel.Channel the signal is passed through before noise
+                and addsignal are added, e.g. path loss and fading. The default is None.
+            out : ndarray
+                Optional contiguous array of len(DSSS) * samples_per_chip samples the
+                signal is written to. The default is a buffer of the signal which is
+                overwritten by the next call, copy the result to keep it.
 
             Returns
             -------
             BPSK : ndarray
                 The BPSK modulated signal.'''
-        
-        self.BPSK = np.array([])
-        for i in range(len(self.DSSS)):
-            if self.DSSS[i] == 1:
-                self.BPSK = np.concatenate((self.BPSK, self.s1))
-            elif self.DSSS[i] == -1:
-                self.BPSK = np.concatenate((self.BPSK, self.s0))
-            self.carrier = np.concatenate((self.carrier, self.s1))
+        if SNR is None:
+            SNR = self.SNR
+        if out is None:
+            out = self._buffer('BPSK', len(self.DSSS) * self.samples_per_chip)
+        # every chip is the carrier times the DSSS chip
+        np.multiply(self.DSSS[:, np.newaxis], self.s1, out=out.reshape(len(self.DSSS), -1))
+        self.BPSK = out
+        # pass the signal through the channel
+        if channel is not None:
+            self.BPSK[:] = channel.apply(self.BPSK[np.newaxis, :])[0]
         #add noise to signal given SNR
         if SNR is not None:
-            noise = np.random.normal(0, 1, len(self.BPSK))
-            noise = noise / np.linalg.norm(noise) * np.linalg.norm(self.BPSK) / (10**(SNR/20))
-            self.BPSK = self.BPSK + noise
+            noise = self._buffer('noise', len(self.BPSK))
+            if self.rng is not None:
+                self.rng.standard_normal(out=noise)
+            else:
+                noise[:] = np.random.normal(0, 1, len(self.BPSK))
+            # keep the noise per chip independent of the number of samples per chip
+            scale = np.linalg.norm(self.BPSK) / (10**(SNR/20)) / np.linalg.norm(noise) * \
+                np.sqrt(self.samples_per_chip / REFERENCE_SAMPLES_PER_CHIP)
+            noise *= scale
+            self.BPSK += noise
         
         #add a signal to the signal
         if addsignal is not None:
-            self.BPSK = self.BPSK + addsignal
+            self.BPSK += addsignal
 
         # plot the BPSK signal
         if (plot):
             plt.figure(figsize=(8, 6))
             plt.subplot(2, 1, 1)
-            plt.plot(np.arange(0, (self.bit_t-1/self.Fs), 1/3000), self.BPSK[:3*len(self.t)], label='Modulated signal')
+            plt.plot(np.arange(3*len(self.t)) / self.sample_rate, self.BPSK[:3*len(self.t)], label='Modulated signal')
             plt.xlabel('Time (s)')
             plt.ylabel('Amplitude (V)')
             plt.title('Modulated signal')
@@ -145,7 +275,7 @@ class UAVSignal:
             plt.grid()
             plt.subplot(2, 1, 2)
             plt.subplots_adjust(hspace=0.5)
-            f, Pxx_den = signal.welch(self.BPSK, self.Fs, nperseg=1024)
+            f, Pxx_den = signal.welch(self.BPSK, self.sample_rate, nperseg=1024)
             plt.semilogy(f, Pxx_den)
             plt.xlabel('Frequency (Hz)')
             plt.ylabel('PSD (V**2/Hz)')
@@ -153,33 +283,53 @@ class UAVSignal:
             plt.grid()
         return self.BPSK
 
-    def demodulate(self,plot=False):
+    def _despread(self, code_samples, rx, soft):
+        '''Despreads the received signal with code_samples into rx and correlates
+            every bit of rx with the carrier into soft.'''
+        np.multiply(self.BPSK, code_samples, out=rx)
+        x = len(self.t) * self.fp
+        np.einsum('ij,ij->i', rx.reshape(-1, x), self.carrier.reshape(-1, x), out=soft)
+
+    @staticmethod
+    def _decide(soft, result):
+        '''Writes the hard decision, 1 or -1, of every correlator output to result.'''
+        np.greater(soft, 0, out=result)
+        result *= 2
+        result -= 1
+        return result
+
+    def demodulate(self,plot=False, soft=False, out=None):
         '''Demodulates the BPSK modulated signal.
             Parameters
             ----------
             plot : bool
                 Optional parameter for plotting the demodulated signal. The default is False.
+            soft : bool
+                Optional parameter for returning the correlator outputs instead of hard
+                decisions, e.g. for a soft decision FEC decoder. The default is False.
+            out : ndarray
+                Optional array of one value per bit the result is written to. The
+                default is a buffer of the signal which is overwritten by the next
+                call, copy the result to keep it.
             
             Returns
             -------
             result : ndarray
-                The demodulated signal.'''
-        self.rx = np.array([])
-        self.demod = np.array([])
-        self.result = np.array([])
+                The demodulated signal, or the correlator outputs if soft is True.'''
         # despread the signal by bringing code back out of the psuedo-random sequence
-        for i in range(len(self.pn_code)):
-            if self.pn_code[i] == 1:
-                self.rx = np.concatenate((self.rx, self.BPSK[(i*len(self.t)):((i+1)*len(self.t))]))
-            else:
-                self.rx = np.concatenate((self.rx, -1 * self.BPSK[(i*len(self.t)):((i+1)*len(self.t))]))
+        self.rx = self._buffer('rx', len(self._code_samples))
+        if soft and out is not None:
+            self.soft = out
+        else:
+            self.soft = self._buffer('soft', self.num_bits)
+        self._despread(self._code_samples, self.rx, self.soft)
     
         # plot the received signal
         if(plot):
             plt.figure(figsize=(8, 6))
             plt.subplot(2, 1, 1)
-            plt.plot(np.arange(0, (self.bit_t-1/self.Fs), 1/10000), self.BPSK[20*len(self.t):30*len(self.t)], label='Received signal')
-            plt.plot(np.arange(0, (self.bit_t-1/self.Fs), 1/10000), self.rx[20*len(self.t):30*len(self.t)], label='Demodulated signal')
+            plt.plot(np.arange(10*len(self.t)) / self.sample_rate, self.BPSK[20*len(self.t):30*len(self.t)], label='Received signal')
+            plt.plot(np.arange(10*len(self.t)) / self.sample_rate, self.rx[20*len(self.t):30*len(self.t)], label='Demodulated signal')
             plt.xlabel('Time (s)')
             plt.ylabel('Amplitude (V)')
             plt.title('Received and demodulated signal')
@@ -187,7 +337,7 @@ class UAVSignal:
             plt.grid()
             plt.subplot(2, 1, 2)
             plt.subplots_adjust(hspace=0.5)
-            f, Pxx_den = signal.welch(self.rx, self.Fs, nperseg=1024)
+            f, Pxx_den = signal.welch(self.rx, self.sample_rate, nperseg=1024)
             plt.semilogy(f, Pxx_den)
             plt.xlabel('Frequency (Hz)')
             plt.ylabel('PSD (V**2/Hz)')
@@ -195,13 +345,11 @@ class UAVSignal:
             plt.grid()
         
         # decode
-        for i in range(int(len(self.message)/self.fp)):
-            x = len(self.t) * self.fp
-            cx = np.sum(self.carrier[(i*x):(i+1)*x] * self.rx[(i*x):(i+1)*x])
-            if cx > 0:
-                self.result = np.concatenate((self.result, [1]))
-            else:
-                self.result = np.concatenate((self.result, [-1]))
+        if soft:
+            return self.soft
+        if out is None:
+            out = self._buffer('result', self.num_bits)
+        self.result = self._decide(self.soft, out)
         return self.result
     
     def demodulate_wrong(self):
@@ -209,24 +357,43 @@ class UAVSignal:
             Returns
             -------
             result_wrong : ndarray'''
-        self.rx2 = np.array([])
-        self.demod2 = np.array([])
-        self.result_wrong = np.array([])
-        for i in range(len(self.pn_code_wrong)):
-            if self.pn_code_wrong[i] == 1:
-                self.rx2 = np.concatenate((self.rx2, self.BPSK[(i*len(self.t)):((i+1)*len(self.t))]))
-            else:
-                self.rx2 = np.concatenate((self.rx2, -1 * self.BPSK[(i*len(self.t)):((i+1)*len(self.t))]))
+        self.rx2 = self._buffer('rx2', len(self._wrong_samples))
         self.demod2 = self.rx2
-        for i in range(int(len(self.message)/self.fp)):
-            x = len(self.t) * self.fp
-            cx = np.sum(self.carrier[(i*x):(i+1)*x] * self.demod2[(i*x):(i+1)*x])
-            if cx > 0:
-                self.result_wrong = np.concatenate((self.result_wrong, [1]))
-            else:
-                self.result_wrong = np.concatenate((self.result_wrong, [-1]))
+        soft = self._buffer('soft_wrong', self.num_bits)
+        self._despread(self._wrong_samples, self.rx2, soft)
+        self.result_wrong = self._decide(soft, self._buffer('result_wrong', self.num_bits))
         return self.result_wrong
     
+    def to_capture_rate(self, samples=None):
+        '''Resamples a simulated waveform to the capture rate Fs.
+            samples : ndarray
+                The waveform at the simulation rate. The default is the modulated
+                signal.
+
+            Returns
+            -------
+            samples : ndarray'''
+        if samples is None:
+            samples = self.BPSK
+        return resample(samples, self.sample_rate, self.Fs)
+
+    def from_capture_rate(self, samples):
+        '''Resamples a captured waveform to the simulation rate and makes it the
+            received signal for demodulate().
+            samples : ndarray
+                The waveform at the capture rate Fs.
+
+            Returns
+            -------
+            BPSK : ndarray'''
+        num_samples = len(self.DSSS) * self.samples_per_chip
+        received = resample(samples, self.Fs, self.sample_rate)
+        if len(received) < num_samples:
+            raise ValueError("capture of %d samples is %d samples at the simulation rate, the signal needs %d"
+                             % (len(samples), len(received), num_samples))
+        self.BPSK = received[:num_samples]
+        return self.BPSK
+
     def plot_message(self):
         '''Plots the original message, the demodulated message and the demodulated message with a wrong code.'''
         plt.figure(figsize=(8, 6))
@@ -0,0 +1,310 @@
+###############################################################################
+# File: uav_sweep.py
+# Author: agent
+# Date: 10/19/2026
+# Revision: 1.0
+# Description: This file contains the sharding of CDMA capacity sweeps over
+#              several machines through a file-based work queue. The planner
+#              writes a scenario and deterministic shards of (interferer
+#              count, trial) work items to a shared directory. Workers on any
+#              node claim shards atomically with lock files, rebuild the users
+#              from the scenario seed and write per-shard results. The merge
+#              step combines the results into the BER and capacity tables,
+#              which are identical to a single-node capacity_sweep().
+###############################################################################
+
+import json
+import multiprocessing
+import os
+import socket
+import time
+
+import numpy as np
+from prettytable import PrettyTable
+
+import uav_shared as uavsh
+import uav_signal as uavs
+
+SCENARIO_FILE = 'scenario.json'
+SHARD_PREFIX = 'shard_'
+
+
+def _shard_path(directory, shard, suffix):
+    return os.path.join(directory, '%s%05d.%s' % (SHARD_PREFIX, shard, suffix))
+
+
+def _write_json(path, data):
+    '''Write a JSON file atomically, readers never see a partial file.'''
+    temp = '%s.%s-%d.tmp' % (path, socket.gethostname(), os.getpid())
+    with open(temp, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp, path)
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def plan_sweep(directory, counts, trials, shard_size=100, num_users=64, num_bits=96, pn_width=16,
+               victim=0, seed=0, Fs=900e6, fc=100, bit_t=.01, samples_per_chip=10):
+    '''Write a capacity sweep scenario and its shards to directory.
+        directory : str
+            The shared directory, created if needed. It must not hold another
+            sweep.
+        counts : list
+            Numbers of interferers to test.
+        trials : int
+            Trials per interferer count.
+        shard_size : int
+            Number of (count, trial) work items per shard. The default is 100.
+        num_users : int
+            Number of users the interferers are chosen from. The default is 64.
+        num_bits : int
+            Number of random message bits of every user. The default is 96.
+        pn_width : int
+            Number of chips in the PN code of every user. The default is 16.
+        victim : int
+            Index of the user under test. The default is 0.
+        seed : int
+            Seed of the users and of the interferers of every trial. The
+            default is 0.
+        Fs, fc, bit_t, samples_per_chip
+            The signal parameters of the users, see UAVSignal.
+
+        Returns
+        -------
+        num_shards : int'''
+    os.makedirs(directory, exist_ok=True)
+    if os.path.exists(os.path.join(directory, SCENARIO_FILE)):
+        raise FileExistsError("%s already holds a sweep" % directory)
+    counts = [int(count) for count in counts]
+    if len(set(counts)) != len(counts):
+        raise ValueError("every interferer count must be given once")
+    if max(counts) >= num_users:
+        raise ValueError("%d interferers need more than %d users" % (max(counts), num_users))
+    items = [(count, trial) for count in counts for trial in range(trials)]
+    shards = [items[i:i + shard_size] for i in range(0, len(items), shard_size)]
+    for shard, shard_items in enumerate(shards):
+        _write_json(_shard_path(directory, shard, 'json'), {'shard': shard, 'items': shard_items})
+    # the scenario is written last, workers wait for it before claiming
+    scenario = {'counts': counts, 'trials': trials, 'num_shards': len(shards), 'num_users': num_users,
+                'num_bits': num_bits, 'pn_width': pn_width, 'victim': victim, 'seed': seed,
+                'Fs': Fs, 'fc': fc, 'bit_t': bit_t, 'samples_per_chip': samples_per_chip}
+    _write_json(os.path.join(directory, SCENARIO_FILE), scenario)
+    return len(shards)
+
+
+def load_scenario(directory):
+    '''Returns the scenario written by plan_sweep().'''
+    return _read_json(os.path.join(directory, SCENARIO_FILE))
+
+
+def make_users(scenario):
+    '''Build the users of a scenario in shared memory. The users only depend
+        on the scenario, so every node builds the same ones.
+        scenario : dict
+            The scenario, see load_scenario().
+
+        Returns
+        -------
+        shared : SharedWaveforms'''
+    rng = np.random.default_rng(scenario['seed'])
+    messages = rng.integers(0, 2, (scenario['num_users'], scenario['num_bits']))
+    pn_codes = rng.integers(0, 2, (scenario['num_users'], scenario['pn_width']))
+    signals = [uavs.UAVSignal(m.copy(), c, scenario['Fs'], scenario['fc'], scenario['pn_width'],
+                              scenario['bit_t'], scenario['samples_per_chip'])
+               for m, c in zip(messages, pn_codes)]
+    return uavsh.SharedWaveforms.from_signals(signals)
+
+
+def claim_shard(directory, num_shards, worker, stale_after=None):
+    '''Claim an unfinished shard by creating its lock file. Creating the lock
+        with O_EXCL is atomic, so every shard is claimed by one worker.
+        directory : str
+            The shared directory.
+        num_shards : int
+            Number of shards of the sweep.
+        worker : str
+            Name of the worker, written to the lock.
+        stale_after : float
+            Seconds after which the lock of an unfinished shard is taken
+            over, e.g. from a crashed node. A shard taken over from a worker
+            which is still running is computed twice with the same result.
+            The default is None, locks never go stale.
+
+        Returns
+        -------
+        shard : int
+            The claimed shard, or None if every shard is done or locked.'''
+    for shard in range(num_shards):
+        if os.path.exists(_shard_path(directory, shard, 'result')):
+            continue
+        lock = _shard_path(directory, shard, 'lock')
+        fd = _take_lock(lock, stale_after)
+        if fd is None:
+            continue
+        with os.fdopen(fd, 'w') as f:
+            f.write('%s %f\n' % (worker, time.time()))
+        # the result may have been written between the check and the lock
+        if os.path.exists(_shard_path(directory, shard, 'result')):
+            _remove_lock(lock)
+            continue
+        return shard
+    return None
+
+
+def _take_lock(lock, stale_after):
+    '''Create the lock file, or take it over when it is stale.
+
+        Returns
+        -------
+        fd : int
+            File descriptor of the lock, or None if another worker holds it.'''
+    while True:
+        try:
+            return os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            pass
+        try:
+            if stale_after is None or time.time() - os.path.getmtime(lock) <= stale_after:
+                return None
+            os.utime(lock)
+            return os.open(lock, os.O_WRONLY | os.O_TRUNC)
+        except FileNotFoundError:
+            # the owner removed the lock in the meantime, try to create it again
+            continue
+
+
+def _remove_lock(lock):
+    try:
+        os.remove(lock)
+    except FileNotFoundError:
+        pass
+
+
+def _wait_for_scenario(directory, poll):
+    '''Returns the scenario once the planner has written it.'''
+    while not os.path.exists(os.path.join(directory, SCENARIO_FILE)):
+        time.sleep(poll)
+    return load_scenario(directory)
+
+
+def run_worker(directory, worker=None, stale_after=None, poll=1.0, descriptor=None):
+    '''Claim and compute shards of a sweep until none are left.
+        directory : str
+            The shared directory.
+        worker : str
+            Name of the worker. The default is the host name and process id.
+        stale_after : float
+            See claim_shard(). The default is None.
+        poll : float
+            Seconds between checks for the scenario while the planner has not
+            written it yet. The default is 1.
+        descriptor : dict
+            Descriptor of the users built by another process on this node with
+            make_users(), see SharedWaveforms.attach(). The default is None,
+            the worker builds the users itself.
+
+        Returns
+        -------
+        shards : list
+            The shards computed by this worker.'''
+    if worker is None:
+        worker = '%s-%d' % (socket.gethostname(), os.getpid())
+    scenario = _wait_for_scenario(directory, poll)
+    done = []
+    shared = None
+    try:
+        while True:
+            shard = claim_shard(directory, scenario['num_shards'], worker, stale_after)
+            if shard is None:
+                break
+            if shared is None:
+                # only build or attach the users when there is work for them
+                if descriptor is None:
+                    shared = make_users(scenario)
+                else:
+                    shared = uavsh.SharedWaveforms.attach(descriptor)
+            items = _read_json(_shard_path(directory, shard, 'json'))['items']
+            errors = [uavsh.bit_errors(shared, scenario['victim'], count, trial, scenario['seed'])
+                      for count, trial in items]
+            _write_json(_shard_path(directory, shard, 'result'),
+                        {'shard': shard, 'worker': worker, 'items': items, 'errors': errors})
+            # the result marks the shard as done, a lock left behind means
+            # the worker stopped before finishing it
+            _remove_lock(_shard_path(directory, shard, 'lock'))
+            done.append(shard)
+    finally:
+        if shared is not None:
+            # only the owner frees the blocks, attached workers close their views
+            shared.unlink()
+    return done
+
+
+def run_local(directory, workers=None, stale_after=None, poll=1.0):
+    '''Run worker processes on this node until the sweep is done. The users
+        are built once in shared memory and every worker attaches to them.
+        directory : str
+            The shared directory.
+        workers : int
+            Number of worker processes. The default is the number of CPUs.
+        stale_after, poll
+            See run_worker().
+
+        Returns
+        -------
+        shards : int
+            Number of shards computed.'''
+    workers = workers or os.cpu_count()
+    scenario = _wait_for_scenario(directory, poll)
+    with make_users(scenario) as shared:
+        with multiprocessing.Pool(workers) as pool:
+            done = pool.starmap(run_worker, [(directory, None, stale_after, poll, shared.descriptor)] * workers)
+    return sum(len(shards) for shards in done)
+
+
+def merge_sweep(directory):
+    '''Combine the shard results into the BER of every interferer count.
+        directory : str
+            The shared directory.
+
+        Returns
+        -------
+        BERs : ndarray
+            The BER for every count, identical to capacity_sweep() on one node.'''
+    scenario = load_scenario(directory)
+    counts = scenario['counts']
+    index = {count: i for i, count in enumerate(counts)}
+    errors = np.zeros((len(counts), scenario['trials']), dtype=int)
+    missing = []
+    for shard in range(scenario['num_shards']):
+        path = _shard_path(directory, shard, 'result')
+        if not os.path.exists(path):
+            missing.append(shard)
+            continue
+        result = _read_json(path)
+        for (count, trial), error in zip(result['items'], result['errors']):
+            errors[index[count], trial] = error
+    if missing:
+        raise RuntimeError("%d of %d shards have no result, e.g. shard %d. Run more workers, locked "
+                           "shards are taken over once their lock is stale_after seconds old"
+                           % (len(missing), scenario['num_shards'], missing[0]))
+    return errors.sum(axis=1) / (scenario['trials'] * scenario['num_bits'])
+
+
+def capacity(counts, BERs, target_ber=1e-3):
+    '''Returns the largest number of interferers whose BER is at most
+        target_ber, -1 if no count reaches it.'''
+    passing = [count for count, ber in zip(counts, BERs) if ber <= target_ber]
+    return max(passing) if passing else -1
+
+
+def print_sweep(counts, BERs, target_ber=1e-3):
+    '''Print the BER of every interferer count and the capacity in a table format.'''
+    table = PrettyTable()
+    table.field_names = ["Interferers", "BER"]
+    for count, ber in zip(counts, BERs):
+        table.add_row([count, "%.2e" % ber])
+    print(table)
+    print("Capacity at BER %g: %d interferers" % (target_ber, capacity(counts, BERs, target_ber)))